@@ -0,0 +1,80 @@
+# article_store.py
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+import config
+
+
+def canonical_url(url):
+    """Normalise a URL so trivially different spellings share one store key"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path or "/"
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+class ArticleStore:
+    """In-memory LRU store of downloaded article pages keyed by canonical URL.
+
+    The accessibility probe in get_news_json puts every page it downloads
+    here, so scrape_and_cache_articles only has to fetch what is missing.
+    Entries expire after `ttl` seconds. `get` only returns complete pages, so
+    a probe that stopped reading early never stands in for a page; such a
+    prefix is kept for `get_prefix` when the server lets it be resumed.
+    """
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or config.ARTICLE_STORE_MAX_ENTRIES
+        self.ttl = ttl or config.ARTICLE_STORE_TTL
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, url, result):
+        """Keep a FetchResult for `url` if it is the whole page or a resumable prefix of it"""
+        if not result.ok or not (result.complete or result.resumable):
+            return
+        key = canonical_url(url)
+        with self.lock:
+            self.entries[key] = (time.time(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, url):
+        """Return the stored whole page for `url`, or None if missing, partial or expired"""
+        result = self._lookup(url)
+        return result if result is not None and result.complete else None
+
+    def get_prefix(self, url):
+        """Return a stored resumable prefix of the page at `url`, or None"""
+        result = self._lookup(url)
+        return result if result is not None and not result.complete else None
+
+    def _lookup(self, url):
+        key = canonical_url(url)
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            stored_at, result = item
+            if time.time() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return result
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_article_store():
+    """Return the process-wide article store shared by the probe and scrape stages"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ArticleStore()
+        return _default_store
@@ -6,6 +6,7 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TEMP_DIR_NAME = "finance_ai_temp" 
+CACHE_DIR_NAME = "finance_ai_cache" # Persists across reports, unlike TEMP_DIR_NAME
 
 ECONOMY_RSS_FEEDS = {
     "Yahoo Finance - Economy": "https://www.yahoo.com/news/rss/economy",
@@ -17,9 +18,116 @@ ECONOMY_RSS_FEEDS = {
 DEFAULT_OPENAI_MODEL = "gpt-4o"
 DEFAULT_MAX_TOKENS_CHATGPT = 4000 # Default for chatgpt_api_call
 MAX_TOKENS_NEWS_SCRAPING = 8000 # Token limit for GPT-4o in scrape_and_cache_articles
+TOKEN_COUNT_CACHE_SIZE = 4096 # Memoized token counts for repeated strings
+REPORT_MAX_WORKERS = 2 # Concurrent model calls while preparing the final analysis prompt
+
+# --- Article Fetching ---
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+FETCH_TIMEOUT = 10 # Seconds per article request
+FETCH_MAX_WORKERS = 16 # Threads in the shared fetch pool
+FETCH_MAX_IN_FLIGHT = 8 # Requests on the wire at once, across all hosts
+FETCH_PER_HOST_LIMIT = 2 # Concurrent requests to any single host
+ARTICLE_STORE_MAX_ENTRIES = 200 # Pages kept in memory between the probe and scrape stages
+ARTICLE_STORE_TTL = 3600 # Seconds before a stored page is downloaded again
+PROBE_CONNECT_TIMEOUT = 1.0 # Seconds to connect when probing an article for a body container
+PROBE_READ_TIMEOUT = 2.0 # Seconds to wait for each chunk of a probed page
+PROBE_MAX_SECONDS = 3.0 # Total time spent reading one probed page
+PROBE_MAX_BYTES = 256 * 1024 # Bytes read before a probe stops looking for the container
+PROBE_CHUNK_BYTES = 16 * 1024
+EXTRACTION_POOL_WORKERS = min(4, os.cpu_count() or 1) # Processes parsing article HTML for all sessions; 0 parses in-process
+EXTRACTION_LOOKAHEAD = 4 # Pages handed to the extraction pool ahead of the one being consumed
+EXTRACTION_POOL_MAX_RESTARTS = 3 # Broken pools replaced before extraction falls back to in-process for good
+
+# --- News Deduplication ---
+NEWS_DEDUP_MAX_DISTANCE = 6 # SimHash bits (of 64) two stories may differ by and still count as copies
+NEWS_DEDUP_MIN_SUMMARY_WORDS = 20 # Shorter summaries (e.g. Google's title echo) are not compared
+
+# --- News Index ---
+NEWS_INDEX_MAX_EARLIER_ARTICLES = 30 # Articles from earlier reports added to the current feed entries for ranking
+NEWS_INDEX_RETENTION_DAYS = 90 # Articles first seen longer ago are dropped from the persistent index
+NEWS_INDEX_REPROBE_SECONDS = 3600 # Indexed articles whose probe failed are probed again after this long
+
+# --- RSS Feed Cache ---
+FEED_CACHE_FRESH_SECONDS = 300 # Serve cached feeds this recent without revalidating
+
+# --- Per-host politeness: (requests per second, burst) ---
+# Hosts are matched most-specific first, so "cnbc.com" also covers "www.cnbc.com"
+HOST_RATE_LIMIT_DEFAULT = (1.0, 1)
+HOST_RATE_LIMITS = {
+    "news.google.com": (1.0, 2),
+    "yahoo.com": (1.0, 2),
+    "cnbc.com": (1.0, 1),
+}
+
+# --- Ticker Symbol Index ---
+SYMBOL_LISTING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.csv") # Bundled listing
+SYMBOL_LISTING_FILENAME = "symbols.csv" # Refreshed listing, written under CACHE_DIR_NAME
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+SYMBOL_PREFIX_MIN_LENGTH = 3 # Shorter name prefixes are too ambiguous to resolve on their own
+SYMBOL_FUZZY_MIN_SCORE = 0.6 # Trigram similarity needed to accept a misspelled name
+SYMBOL_FUZZY_MIN_MARGIN = 0.1 # Lead over the next-best name needed to accept it
+
+AUTOCOMPLETE_INDEX_FILENAME = "ticker_completions.npz" # Serialized autocomplete index, under CACHE_DIR_NAME
+AUTOCOMPLETE_MAX_SUGGESTIONS = 6
+
+# --- Ticker Verification ---
+TICKER_VERIFY_MAX_WORKERS = 4 # Concurrent yfinance lookups when checking suggested tickers
+TICKER_VERIFY_TIMEOUT = 8 # Seconds to wait for all lookups before treating the rest as invalid
+QUOTE_CACHE_TTL = 300 # Seconds a ticker lookup is reused
+QUOTE_CACHE_MAX_ENTRIES = 500
+
+# --- LLM Resilience ---
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") # Point at a local OpenAI-compatible server for testing
+LLM_MAX_RETRIES = 4 # Retries on 429/5xx/connection errors
+LLM_BACKOFF_BASE_SECONDS = 1.0 # Backoff before retry n is jittered within [0, base * 2**n]
+LLM_BACKOFF_MAX_SECONDS = 30.0
+LLM_RETRY_AFTER_MAX_SECONDS = 120.0 # Give up rather than honour a longer Retry-After
+LLM_MAX_CONCURRENCY_PER_MODEL = 4 # Concurrent calls per model across all sessions
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5 # Consecutive transient failures before failing fast
+LLM_CIRCUIT_RESET_SECONDS = 30.0 # How long the circuit stays open before a trial call
+
+# --- LLM Response Cache (opt-in) ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024 # Least recently used responses are evicted past this size
+LLM_CACHE_TTLS = { # Seconds a cached response stays valid per task; 0 disables caching
+    "ticker_resolver": 7 * 24 * 3600,
+    "fact_extraction": 24 * 3600,
+    "ranking": 3600,
+    "macro_analysis": 3600,
+    "analysis": 0,
+}
 
 # --- Analysis Defaults ---
 DEFAULT_N_DAYS = 7
+STOCK_SUMMARY_MIN_SESSIONS = 10 # Longer price windows are sent as an indicator summary
+STOCK_SUMMARY_RECENT_SESSIONS = 5 # Sessions kept at daily resolution after the summary
+MAX_N_DAYS = 365 # Longest analysis window offered in the UI
+PRICE_INTERVALS = ["1d", "1h", "15m", "5m"] # Bar sizes offered in the UI; anything but 1d uses intraday mode
+INTRADAY_MAX_DAYS = {"1h": 730, "15m": 60, "5m": 60} # How far back yfinance serves each interval
+INTRADAY_CHUNK_DAYS = {"1h": 60, "15m": 14, "5m": 7} # Days of bars fetched and aggregated per request
+INTRADAY_OPENING_RANGE_MINUTES = 30
+INTRADAY_DETAIL_SESSIONS = 10 # Sessions listed individually after the intraday averages
+PRICE_MATRIX_DAYS = 365 # History kept in the shared peer-group price matrices
+US_MARKET_TIMEZONE = "America/New_York"
+DAILY_BAR_FINAL_TIME = "16:30" # Market-local time after which the day's daily bar is stored as final
+
+# Peer groups for cross-sectional comparisons; a ticker is compared with the rest of its group
+PEER_GROUPS = {
+    "Mega-cap tech": ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NFLX", "ORCL"],
+    "Semiconductors": ["NVDA", "AMD", "AVGO", "INTC", "QCOM", "TXN", "MU", "AMAT", "LRCX", "KLAC", "ADI", "MRVL", "TSM", "ASML"],
+    "Software": ["CRM", "ADBE", "NOW", "INTU", "WDAY", "PANW", "CRWD", "SNOW", "PLTR", "DDOG", "FTNT"],
+    "Banks": ["JPM", "BAC", "WFC", "C", "GS", "MS", "USB", "PNC", "SCHW"],
+    "Payments": ["V", "MA", "AXP", "PYPL", "SQ", "COF"],
+    "Pharma": ["LLY", "JNJ", "MRK", "ABBV", "PFE", "BMY", "AMGN", "GILD", "NVO", "AZN"],
+    "Energy": ["XOM", "CVX", "COP", "EOG", "OXY", "SLB", "PSX", "MPC", "SHEL", "BP"],
+    "Retail": ["WMT", "COST", "TGT", "HD", "LOW", "TJX", "ROST", "DG", "DLTR", "KR"],
+    "Autos": ["TSLA", "GM", "F", "TM", "RIVN", "LCID", "NIO"],
+    "Consumer staples": ["PG", "KO", "PEP", "CL", "KMB", "MDLZ", "GIS", "KHC", "HSY", "PM", "MO"],
+    "Aerospace and defense": ["BA", "RTX", "LMT", "NOC", "GD", "GE"],
+}
+STOCK_CACHE_TOKEN_BUDGET = 1200 # Token budget for the price data in the analysis prompt
+STOCK_CACHE_DAILY_SESSIONS = 20 # Recent sessions kept at daily resolution when compressing
 
 # --- Streamlit Page Configuration ---
 PAGE_CONFIG = {
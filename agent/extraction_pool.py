@@ -0,0 +1,136 @@
+# extraction_pool.py
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+from html_extractor import extract_article, extract_paragraphs
+from token_counter import get_encoding, num_tokens_from_string
+
+EXTRACTORS = {"article": extract_article, "paragraphs": extract_paragraphs}
+
+
+def extract_page(page, kind="article", encoding=None):
+    """Extract text from one page (raw bytes or str) and count its tokens.
+
+    Returns (text, tokens); text is None when an article page has no body container.
+    """
+    text = EXTRACTORS[kind](page, encoding)
+    return text, num_tokens_from_string(text) if text else 0
+
+def _warm_worker():
+    # Load the tokenizer while the worker starts rather than on its first page
+    try:
+        get_encoding()
+    except Exception as e:
+        print(f"Extraction worker could not preload the tokenizer: {e}")
+
+
+class ExtractionPool:
+    """Runs HTML extraction in worker processes so parsing does not hold the GIL.
+
+    The workers start on first use and are kept for the life of the app, so
+    every report and every Streamlit session shares them. With
+    `max_workers=0`, or if the pool breaks, pages are parsed in-process.
+    """
+    def __init__(self, max_workers=None, lookahead=None):
+        self.max_workers = config.EXTRACTION_POOL_WORKERS if max_workers is None else max_workers
+        self.lookahead = lookahead or config.EXTRACTION_LOOKAHEAD
+        self._executor = None
+        self._breaks = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: forking the threaded Streamlit server is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_warm_worker)
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._breaks += 1
+                if self._breaks >= config.EXTRACTION_POOL_MAX_RESTARTS:
+                    print(f"Extraction pool broke {self._breaks} times; parsing in-process from now on")
+                    self.max_workers = 0
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, page, kind="article", encoding=None):
+        """Queue one page for extraction; returns a Future of (text, tokens)"""
+        if self.max_workers > 0:
+            executor = self._get_executor()
+            try:
+                return executor.submit(extract_page, page, kind, encoding)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool on the next call and parse this page here
+                self._reset(executor)
+        return self._inline(page, kind, encoding)
+
+    @staticmethod
+    def _inline(page, kind, encoding):
+        future = Future()
+        try:
+            future.set_result(extract_page(page, kind, encoding))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def extract_responses(self, responses, kind="article"):
+        """Yield (FetchResult, Future of (text, tokens)) for each response, in order.
+
+        Up to `lookahead` successful downloads are parsed ahead of the one being
+        consumed; failed downloads come with None instead of a Future. Closing
+        the generator early cancels extractions that have not started.
+        """
+        pending = deque()
+
+        def result(response, future):
+            if future is not None and isinstance(future.exception(), BrokenProcessPool):
+                # The worker died mid-page; parse it here instead
+                future = self._inline(*self._page_args(response, kind))
+            return response, future
+
+        try:
+            for response in responses:
+                future = self.submit(*self._page_args(response, kind)) if response.ok else None
+                pending.append((response, future))
+                if len(pending) > self.lookahead:
+                    yield result(*pending.popleft())
+            while pending:
+                yield result(*pending.popleft())
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    @staticmethod
+    def _page_args(response, kind):
+        # Raw bytes let the parser decode once; the decoded text is the fallback for hand-built results
+        if response.content:
+            return response.content, kind, response.encoding
+        return response.text, kind, None
+
+    def shutdown(self):
+        """Stop the worker processes; a later call starts a new pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_extraction_pool():
+    """Return the process-wide extraction pool shared by all reports"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ExtractionPool()
+        return _default_pool
@@ -0,0 +1,125 @@
+# feed_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import feedparser
+
+import config
+
+
+def _to_json_entry(entry):
+    # struct_time is a tuple, so json stores the *_parsed fields as plain lists
+    return dict(entry)
+
+def _from_json_entry(data):
+    entry = feedparser.FeedParserDict(data)
+    for key, value in data.items():
+        if key.endswith("_parsed") and isinstance(value, list) and len(value) == 9:
+            entry[key] = time.struct_time(value)
+    return entry
+
+
+class FeedCache:
+    """Persistent RSS cache that revalidates feeds with conditional GETs.
+
+    Each feed's ETag, Last-Modified and parsed entries are stored on disk.
+    Feeds fetched less than `fresh_seconds` ago are served without any network
+    call; older ones are revalidated and the stored parse is reused on a 304.
+    If the network fails, the last good parse is returned.
+    """
+    def __init__(self, cache_dir=None, fresh_seconds=None):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, "feeds")
+        self.fresh_seconds = config.FEED_CACHE_FRESH_SECONDS if fresh_seconds is None else fresh_seconds
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, url):
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, url, record):
+        path = self._path(url)
+        # Write to a temp file first so concurrent readers never see a partial record
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _as_feed(self, record, status):
+        return feedparser.FeedParserDict(
+            entries=[_from_json_entry(entry) for entry in record["entries"]],
+            feed=feedparser.FeedParserDict(record.get("feed", {})),
+            status=status,
+            etag=record.get("etag"),
+            modified=record.get("modified"),
+            from_cache=True,
+        )
+
+    def parse(self, url):
+        """Drop-in replacement for feedparser.parse(url) backed by the cache"""
+        record = self._load(url)
+
+        if record and time.time() - record.get("fetched_at", 0) < self.fresh_seconds:
+            return self._as_feed(record, status=200)
+
+        if record:
+            feed = feedparser.parse(url, etag=record.get("etag"), modified=record.get("modified"))
+        else:
+            feed = feedparser.parse(url)
+
+        status = feed.get("status")
+        if record and (status == 304 or not feed.entries):
+            # Not modified, or the fetch failed: reuse the stored parse
+            if status == 304:
+                record["fetched_at"] = time.time()
+                with self.lock:
+                    self._save(url, record)
+            return self._as_feed(record, status=status or 200)
+
+        if feed.entries:
+            record = {
+                "url": url,
+                "etag": feed.get("etag"),
+                "modified": feed.get("modified"),
+                "fetched_at": time.time(),
+                "feed": dict(feed.get("feed", {})),
+                "entries": [_to_json_entry(entry) for entry in feed.entries],
+            }
+            try:
+                with self.lock:
+                    self._save(url, record)
+            except Exception as e:
+                print(f"Error caching feed {url}: {str(e)}")
+
+        return feed
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_feed_cache():
+    """Return the process-wide feed cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = FeedCache()
+        return _default_cache
+
+def parse_feed(url):
+    """Parse an RSS feed through the shared conditional-GET cache"""
+    return get_feed_cache().parse(url)
@@ -0,0 +1,284 @@
+# fetch_engine.py
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+
+CHARSET_PATTERN = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+# Bytes of the previous chunks searched again, so a tag split across chunks still matches
+STOP_PATTERN_OVERLAP = 1024
+
+
+def declared_encoding(response):
+    """Charset named in the Content-Type header, or None to let the parser read the page's own declaration"""
+    match = CHARSET_PATTERN.search(response.headers.get("Content-Type", ""))
+    return match.group(1) if match else None
+
+
+def _wire_bytes(response, default=None):
+    # Compressed bytes pulled off the socket; falls back to the decoded size
+    try:
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return len(response.content) if default is None else default
+
+def _range_validator(response):
+    # Only uncompressed bodies can be resumed: a range of a gzip stream cannot be decoded on its own
+    if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    if response.headers.get("Content-Encoding", "identity").lower() not in ("", "identity"):
+        return None
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+def _decode(content, encoding):
+    try:
+        return content.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+
+class FetchResult:
+    """Outcome of a single GET request; `error` is set instead of raising.
+
+    `complete` is False when only a prefix of the body was read, and
+    `bytes_read` counts the body bytes that came over the wire. A prefix
+    carries the page's `validator` (ETag or Last-Modified) when the server
+    accepts byte ranges, so the rest can be requested later.
+    """
+    def __init__(self, url, status_code=None, text="", content=b"", error=None, elapsed=0.0, encoding=None,
+                 bytes_read=0, complete=True, validator=None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.content = content
+        self.encoding = encoding
+        self.bytes_read = bytes_read
+        self.complete = complete
+        self.validator = validator
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code == 200
+
+    @property
+    def resumable(self):
+        """True for a prefix whose remainder can be fetched with a Range request"""
+        return self.ok and not self.complete and self.validator is not None
+
+
+class FetchEngine:
+    """Thread-pooled HTTP fetcher sharing one keep-alive connection pool.
+
+    At most `max_in_flight` requests are on the wire at once, and at most
+    `per_host` of them target the same host, so one slow publisher only ties
+    up its own slots.
+    """
+    def __init__(self, max_workers=None, max_in_flight=None, per_host=None, timeout=None, headers=None):
+        self.max_in_flight = max_in_flight or config.FETCH_MAX_IN_FLIGHT
+        self.per_host = per_host or config.FETCH_PER_HOST_LIMIT
+        self.timeout = timeout or config.FETCH_TIMEOUT
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or {"User-Agent": config.BROWSER_USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=self.max_in_flight, pool_maxsize=self.max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or config.FETCH_MAX_WORKERS,
+                                            thread_name_prefix="fetch")
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._host_slots = {}
+        self._host_queues = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, host):
+        # Callers hold self._host_lock
+        if host not in self._host_slots:
+            self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+        return self._host_slots[host]
+
+    def submit(self, url, headers=None, timeout=None, rate_limiter=None, prefix=None):
+        """Queue one URL and return a Future of its FetchResult.
+
+        Requests wait for a host slot and for `rate_limiter`'s per-host delay
+        in a per-host queue, so worker threads are only handed requests that
+        can go on the wire; a busy host cannot fill the pool. A resumable
+        `prefix` of the page (see fetch_prefix) is completed with a Range
+        request instead of downloading the page again.
+        """
+        future = Future()
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            self._host_queues.setdefault(host, deque()).append((future, url, headers, timeout, rate_limiter, prefix))
+        self._dispatch(host)
+        return future
+
+    def _dispatch(self, host):
+        # Start queued requests for `host` while it has free slots
+        while True:
+            with self._host_lock:
+                queue = self._host_queues.get(host)
+                while queue and queue[0][0].cancelled():
+                    queue.popleft()
+                if not queue:
+                    self._host_queues.pop(host, None)
+                    return
+                if not self._host_semaphore(host).acquire(blocking=False):
+                    return
+                job = queue.popleft()
+            rate_limiter = job[4]
+            delay = rate_limiter.reserve(job[1]) if rate_limiter else 0.0
+            if delay > 0:
+                # Hold the host slot through the delay, but not a worker thread
+                timer = threading.Timer(delay, self._start, args=(host, job))
+                timer.daemon = True
+                timer.start()
+            else:
+                self._start(host, job)
+
+    def _start(self, host, job):
+        try:
+            self._executor.submit(self._run, host, job)
+        except RuntimeError as e:
+            # The executor was shut down
+            future = job[0]
+            if future.set_running_or_notify_cancel():
+                future.set_result(FetchResult(job[1], error=str(e)))
+            self._release_host(host)
+
+    def _run(self, host, job):
+        future, url, headers, timeout, _, prefix = job
+        try:
+            if future.set_running_or_notify_cancel():
+                future.set_result(self._get(url, headers, timeout, prefix))
+        finally:
+            self._release_host(host)
+
+    def _release_host(self, host):
+        with self._host_lock:
+            slots = self._host_semaphore(host)
+        slots.release()
+        self._dispatch(host)
+
+    def _get(self, url, headers, timeout, prefix=None):
+        start = time.time()
+        request_headers = headers
+        resuming = prefix is not None and prefix.resumable
+        if resuming:
+            # If-Range makes the server send the whole page instead if it changed since the prefix
+            request_headers = dict(headers or {}, **{"Range": f"bytes={len(prefix.content)}-",
+                                                     "If-Range": prefix.validator,
+                                                     "Accept-Encoding": "identity"})
+        try:
+            with self._in_flight:
+                response = self.session.get(url, headers=request_headers, timeout=timeout or self.timeout)
+            if resuming and response.status_code == 206:
+                if not response.headers.get("Content-Range", "").startswith(f"bytes {len(prefix.content)}-"):
+                    return self._get(url, headers, timeout)
+                content = prefix.content + response.content
+                return FetchResult(url, status_code=200, text=_decode(content, prefix.encoding), content=content,
+                                   elapsed=time.time() - start, encoding=prefix.encoding,
+                                   bytes_read=_wire_bytes(response))
+            return FetchResult(url, status_code=response.status_code, text=response.text,
+                               content=response.content, elapsed=time.time() - start,
+                               encoding=declared_encoding(response), bytes_read=_wire_bytes(response))
+        except Exception as e:
+            return FetchResult(url, error=str(e), elapsed=time.time() - start)
+
+    def fetch(self, url, headers=None, timeout=None, rate_limiter=None):
+        """Fetch one URL, blocking until it is done.
+
+        If `rate_limiter` is given, its per-host budget is honoured before
+        the request goes out.
+        """
+        return self.submit(url, headers, timeout, rate_limiter).result()
+
+    def fetch_prefix(self, url, stop_pattern=None, max_bytes=None, headers=None, timeout=None, max_seconds=None):
+        """Stream the start of a page, stopping once `stop_pattern` (a bytes regex) matches.
+
+        Reading also stops after `max_bytes` or `max_seconds`; `timeout` is a
+        (connect, read) pair. The result is `complete` only when the body ran
+        out before any of those limits. Runs in the calling thread but takes
+        the same host and global slots as `fetch`.
+        """
+        max_bytes = max_bytes or config.PROBE_MAX_BYTES
+        timeout = timeout or (config.PROBE_CONNECT_TIMEOUT, config.PROBE_READ_TIMEOUT)
+        deadline = time.time() + (max_seconds or config.PROBE_MAX_SECONDS)
+        start = time.time()
+        body = bytearray()
+        bytes_read = 0
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            slots = self._host_semaphore(host)
+        slots.acquire()
+        try:
+            with self._in_flight:
+                with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                    complete = False
+                    if response.status_code == 200:
+                        for chunk in response.iter_content(chunk_size=config.PROBE_CHUNK_BYTES):
+                            scan_from = max(0, len(body) - STOP_PATTERN_OVERLAP)
+                            body += chunk
+                            if stop_pattern is not None and stop_pattern.search(body, scan_from):
+                                break
+                            if len(body) >= max_bytes or time.time() > deadline:
+                                break
+                        else:
+                            complete = True
+                    bytes_read = _wire_bytes(response, len(body))
+            content = bytes(body)
+            encoding = declared_encoding(response)
+            return FetchResult(url, status_code=response.status_code, text=_decode(content, encoding),
+                               content=content, elapsed=time.time() - start, encoding=encoding,
+                               bytes_read=bytes_read, complete=complete,
+                               validator=None if complete else _range_validator(response))
+        except Exception as e:
+            return FetchResult(url, error=str(e), elapsed=time.time() - start, bytes_read=bytes_read or len(body),
+                               complete=False)
+        finally:
+            self._release_host(host)
+
+    def fetch_ordered(self, urls, headers=None, timeout=None, rate_limiter=None, prefixes=None):
+        """Fetch all URLs concurrently, yielding results in the order of `urls`.
+
+        `prefixes` maps URLs to pages already partly read, which are resumed
+        where possible. Closing the generator early cancels requests that have
+        not started yet.
+        """
+        prefixes = prefixes or {}
+        futures = [self.submit(url, headers, timeout, rate_limiter, prefixes.get(url)) for url in urls]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def fetch_all(self, urls, headers=None, timeout=None, rate_limiter=None):
+        """Fetch all URLs concurrently and return the results in input order"""
+        return list(self.fetch_ordered(urls, headers=headers, timeout=timeout, rate_limiter=rate_limiter))
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+def get_fetch_engine():
+    """Return the process-wide engine so every report shares one connection pool"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = FetchEngine()
+        return _default_engine
@@ -2,26 +2,25 @@
 import json
 import re
 import os
-import tiktoken
-from model_manager import ModelManager
-
-def num_tokens_from_string(string, encoding_name="cl100k_base"):
-    """Returns the number of tokens in a text string."""
-    encoding = tiktoken.get_encoding(encoding_name)
-    num_tokens = len(encoding.encode(string))
-    return num_tokens
+from concurrent.futures import ThreadPoolExecutor
 
+import config
+from model_manager import ModelManager
+from report_parser import SectionStreamParser
+from token_counter import num_tokens_from_string
 
+def generate_financial_report(ticker, cached_data, macro_news, stock_cache, api_key, status_text, on_section=None):
+    """Generate a comprehensive financial report using a multi-model approach.
 
-def generate_financial_report(ticker, cached_data, macro_news, stock_cache, api_key, status_text):
-    """Generate a comprehensive financial report using a multi-model approach"""
+    If `on_section` is given, the final analysis is streamed and
+    `on_section(index, body)` is called as soon as each `Section N:` is complete.
+    """
     status_text.text("Generating financial report using specialized models...")
     
     # Initialize model manager
     model_manager = ModelManager(api_key)
     
     # Step 1: Extract facts from news articles
-    status_text.text("Extracting key facts from news articles...")
     fact_extraction_prompt = f"""
     Extract only objective facts from these news articles about {ticker}. 
     Focus on:
@@ -41,10 +40,7 @@ def generate_financial_report(ticker, cached_data, macro_news, stock_cache, api_
     {cached_data}
     """
     
-    extracted_facts = model_manager.invoke_model("fact_extraction", fact_extraction_prompt)
-    
-    # Step 1: Process macro news separately
-    status_text.text("Analyzing macroeconomic trends...")
+    # Step 2: Process macro news separately
     macro_prompt = f"""
     You are an Economic Analyst reviewing the latest news articles. Base on the news Only Return me Below information:
     YOU Are analyzing for the economic/federal reserve/president policy that impact the macroeconomic 
@@ -64,7 +60,14 @@ def generate_financial_report(ticker, cached_data, macro_news, stock_cache, api_
     {macro_news}
     """
     
-    macro_report = model_manager.invoke_model("macro_analysis", macro_prompt)
+    # Steps 1 and 2 are independent, so both model calls run concurrently
+    status_text.text("Extracting key facts and analyzing macroeconomic trends...")
+    with ThreadPoolExecutor(max_workers=config.REPORT_MAX_WORKERS) as executor:
+        facts_future = executor.submit(model_manager.invoke_model, "fact_extraction", fact_extraction_prompt)
+        macro_future = executor.submit(model_manager.invoke_model, "macro_analysis", macro_prompt)
+        # result() re-raises any model error here, in the calling thread
+        extracted_facts = facts_future.result()
+        macro_report = macro_future.result()
     
     # Step 3: Generate final financial report
     status_text.text("Creating comprehensive financial analysis...")
@@ -137,7 +140,16 @@ def generate_financial_report(ticker, cached_data, macro_news, stock_cache, api_
     Note: The subtitle is important for the next pipeline to detect the content and title, so keep it in same upper case lower case as I define.
     """
     
-    financial_report = model_manager.invoke_model("analysis", final_prompt)
+    if on_section:
+        parser = SectionStreamParser()
+        for chunk in model_manager.stream_model("analysis", final_prompt):
+            for index, body in parser.feed(chunk):
+                on_section(index, body)
+        for index, body in parser.close():
+            on_section(index, body)
+        financial_report = parser.text
+    else:
+        financial_report = model_manager.invoke_model("analysis", final_prompt)
     # debug_log(f"Financial report generated: {len(financial_report)} characters", status_text)
     print(f"Macro report: {macro_report[:100]}...")
     print(f"Financial report length: {len(financial_report)}")
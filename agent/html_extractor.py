@@ -0,0 +1,160 @@
+# html_extractor.py
+import re
+import threading
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Same selector the scrape stage has always used for article bodies
+ARTICLE_CLASS_PATTERN = re.compile(r'(article|content|story|post)-?(body|content|text)', re.I)
+# Opening tag of a container has_article accepts; lets a streamed probe stop reading early
+ARTICLE_START_PATTERN = re.compile(rb"""<article[\s>/]|<div\b[^>]*?\bclass\s*=\s*["']?(?:[^"'>]*\s)?content[\s"'>]""", re.I)
+# Text inside these is never article copy; BeautifulSoup's get_text skips it too
+NON_TEXT_TAGS = ("script", "style", "template")
+
+_parsers = threading.local()
+
+
+def _parser(encoding):
+    # lxml parsers must not be shared between threads
+    key = encoding or "detect"
+    parsers = getattr(_parsers, "parsers", None)
+    if parsers is None:
+        parsers = _parsers.parsers = {}
+    if key not in parsers:
+        parsers[key] = etree.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True,
+                                        no_network=True, recover=True)
+    return parsers[key]
+
+def _parse(html, encoding=None):
+    """Parse str or bytes with libxml2 and blank out script/style text; returns the root or None.
+
+    Bytes are decoded with `encoding` when given, else as the page declares. An
+    encoding libxml2 does not know raises LookupError.
+    """
+    if isinstance(html, str):
+        # Already decoded: re-encode as UTF-8 and say so, rather than trusting a <meta charset>
+        root = etree.fromstring(html.encode("utf-8"), _parser("utf-8"))
+    else:
+        root = etree.fromstring(html, _parser(encoding))
+    if root is not None:
+        # Emptied rather than removed, so the text around them stays in separate pieces as in bs4;
+        # elements inside a <template> stay too, as bs4 still finds its (empty) paragraphs
+        for element in root.iter(*NON_TEXT_TAGS):
+            element.text = None
+            for child in element.iterdescendants():
+                child.text = child.tail = None
+    return root
+
+def _find_container(root):
+    for element in root.iter("article"):
+        return element
+    for element in root.iter("div"):
+        if ARTICLE_CLASS_PATTERN.search(element.get("class") or ""):
+            return element
+    for element in root.iter("main"):
+        return element
+    return None
+
+
+def _has_article_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return bool(soup.find("article") or soup.find("div", {"class": "content"}))
+
+def _extract_paragraphs_bs4(html):
+    soup = BeautifulSoup(html, "lxml")
+    return "\n".join([para.get_text() for para in soup.find_all('p')]).strip()
+
+def _extract_article_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    article_body = soup.find("article") or \
+                   soup.find("div", class_=ARTICLE_CLASS_PATTERN) or \
+                   soup.find("main")
+    if not article_body:
+        return None
+    return "\n".join([p.get_text(separator=' ', strip=True) for p in article_body.find_all("p")])
+
+
+def has_article(html, encoding=None):
+    """True if the page has an <article> or a div with class "content" (the accessibility probe)"""
+    # Most pages can be ruled out without parsing at all
+    sample = html.lower() if isinstance(html, str) else html.lower().decode("latin-1")
+    if "<article" not in sample and "content" not in sample:
+        return False
+    try:
+        root = _parse(html, encoding)
+        if root is None:
+            return False
+        if next(root.iter("article"), None) is not None:
+            return True
+        return any("content" in (div.get("class") or "").split() for div in root.iter("div"))
+    except (etree.LxmlError, ValueError, LookupError):
+        return _has_article_bs4(html)
+
+def extract_paragraphs(html, encoding=None):
+    """Text of every <p> on the page, one per line (used for macro news pages)"""
+    try:
+        root = _parse(html, encoding)
+        if root is None:
+            return ""
+        return "\n".join("".join(p.itertext()) for p in root.iter("p")).strip()
+    except (etree.LxmlError, ValueError, LookupError):
+        return _extract_paragraphs_bs4(html)
+
+def extract_article(html, encoding=None):
+    """Paragraph text of the article body, or None when no article container is found"""
+    try:
+        root = _parse(html, encoding)
+        container = _find_container(root) if root is not None else None
+        if container is None:
+            return None
+        paragraphs = []
+        for p in container.iter("p"):
+            paragraphs.append(" ".join(text.strip() for text in p.itertext() if text.strip()))
+        return "\n".join(paragraphs)
+    except (etree.LxmlError, ValueError, LookupError):
+        return _extract_article_bs4(html)
+
+
+if __name__ == "__main__":
+    # Benchmark over saved pages: python html_extractor.py <directory of .html files> [repeats]
+    import glob
+    import os
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python html_extractor.py <directory of saved .html pages> [repeats]")
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    paths = sorted(glob.glob(os.path.join(sys.argv[1], "*.htm*")))
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read().decode("utf-8", errors="replace")))
+    if not pages:
+        sys.exit(f"No .html files found in {sys.argv[1]}")
+    total_mb = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB, best of {repeats} runs")
+
+    checks = [
+        ("probe", _has_article_bs4, has_article),
+        ("paragraphs", _extract_paragraphs_bs4, extract_paragraphs),
+        ("article", _extract_article_bs4, extract_article),
+    ]
+    for name, reference, fast in checks:
+        timings = {}
+        for label, func in (("bs4", reference), ("fast", fast)):
+            best = None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                results = [func(html) for _, html in pages]
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = (best, results)
+
+        mismatches = [page for (page, _), a, b in zip(pages, timings["bs4"][1], timings["fast"][1]) if a != b]
+        old, new = timings["bs4"][0], timings["fast"][0]
+        print(f"{name:>10}: bs4 {total_mb / old:6.1f} MB/s, fast {total_mb / new:6.1f} MB/s, "
+              f"speedup {old / new:5.1f}x, identical output on {len(pages) - len(mismatches)}/{len(pages)} pages")
+        for page in mismatches[:5]:
+            print(f"{'':>12}differs: {page}")
@@ -0,0 +1,105 @@
+# indicators.py
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _date(index, position):
+    return index[position].strftime('%m-%d-%Y')
+
+def _last_return(close, periods):
+    if len(close) <= periods:
+        return None
+    return close[-1] / close[-1 - periods] - 1
+
+def _annualized_vol(log_returns):
+    if len(log_returns) < 2:
+        return None
+    return float(np.std(log_returns, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR))
+
+
+def compute_indicators(data, atr_window=14):
+    """Compute window statistics from daily OHLCV bars in one vectorized pass.
+
+    Returns a dict of returns, realized volatility, ATR, volume z-scores,
+    drawdown and opening-gap statistics over the whole window.
+    """
+    index = data.index
+    open_ = data['Open'].to_numpy(dtype=float)
+    high = data['High'].to_numpy(dtype=float)
+    low = data['Low'].to_numpy(dtype=float)
+    close = data['Close'].to_numpy(dtype=float)
+    volume = data['Volume'].to_numpy(dtype=float)
+    prev_close = close[:-1]
+
+    log_returns = np.diff(np.log(close))
+
+    # True range needs the previous close, so the first bar only contributes High - Low
+    true_range = high - low
+    true_range[1:] = np.maximum.reduce([high[1:] - low[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)])
+    atr = float(true_range[-min(atr_window, len(true_range)):].mean())
+
+    volume_std = volume.std()
+    volume_z = (volume - volume.mean()) / volume_std if volume_std > 0 else np.zeros_like(volume)
+
+    running_peak = np.maximum.accumulate(close)
+    drawdown = close / running_peak - 1
+
+    gaps = open_[1:] / prev_close - 1
+    large_gaps = np.abs(gaps) > 0.01
+
+    indicators = {
+        "start": _date(index, 0),
+        "end": _date(index, -1),
+        "sessions": len(close),
+        "first_close": close[0],
+        "last_close": close[-1],
+        "high": high.max(),
+        "high_date": _date(index, int(high.argmax())),
+        "low": low.min(),
+        "low_date": _date(index, int(low.argmin())),
+        "window_return": close[-1] / close[0] - 1,
+        "return_5d": _last_return(close, 5),
+        "return_20d": _last_return(close, 20),
+        "realized_vol": _annualized_vol(log_returns),
+        "realized_vol_5d": _annualized_vol(log_returns[-5:]),
+        "atr": atr,
+        "atr_pct": atr / close[-1],
+        "avg_range_pct": float(((high - low) / close).mean()),
+        "avg_volume": volume.mean(),
+        "last_volume": volume[-1],
+        "last_volume_z": float(volume_z[-1]),
+        "peak_volume_z": float(volume_z.max()),
+        "peak_volume_date": _date(index, int(volume_z.argmax())),
+        "max_drawdown": float(drawdown.min()),
+        "max_drawdown_date": _date(index, int(drawdown.argmin())),
+        "current_drawdown": float(drawdown[-1]),
+        "large_gaps": int(large_gaps.sum()),
+        "largest_gap": float(gaps[np.abs(gaps).argmax()]) if len(gaps) else None,
+        "largest_gap_date": _date(index, int(np.abs(gaps).argmax()) + 1) if len(gaps) else None,
+        "mean_abs_gap": float(np.abs(gaps).mean()) if len(gaps) else None,
+    }
+    return indicators
+
+
+def _pct(value):
+    return "n/a" if value is None else f"{value * 100:+.2f}%"
+
+def format_indicator_summary(indicators):
+    """Render indicators as a compact text block for the analysis prompt"""
+    ind = indicators
+    lines = [
+        f"Window: {ind['start']} to {ind['end']} ({ind['sessions']} sessions)",
+        f"Close: last {ind['last_close']:.2f}, first {ind['first_close']:.2f}, "
+        f"high {ind['high']:.2f} ({ind['high_date']}), low {ind['low']:.2f} ({ind['low_date']})",
+        f"Returns: window {_pct(ind['window_return'])}, 5d {_pct(ind['return_5d'])}, 20d {_pct(ind['return_20d'])}",
+        f"Realized volatility (annualized): window {_pct(ind['realized_vol'])}, last 5d {_pct(ind['realized_vol_5d'])}",
+        f"ATR: {ind['atr']:.2f} ({ind['atr_pct'] * 100:.2f}% of close), average daily range {ind['avg_range_pct'] * 100:.2f}%",
+        f"Volume: average {int(ind['avg_volume'])}, last {int(ind['last_volume'])} (z {ind['last_volume_z']:+.2f}), "
+        f"peak z {ind['peak_volume_z']:+.2f} on {ind['peak_volume_date']}",
+        f"Drawdown: max {_pct(ind['max_drawdown'])} (trough {ind['max_drawdown_date']}), current {_pct(ind['current_drawdown'])}",
+    ]
+    if ind['largest_gap'] is not None:
+        lines.append(f"Gaps: {ind['large_gaps']} opening gaps over 1%, largest {_pct(ind['largest_gap'])} "
+                     f"on {ind['largest_gap_date']}, mean absolute gap {ind['mean_abs_gap'] * 100:.2f}%")
+    return "\n".join(lines)
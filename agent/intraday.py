@@ -0,0 +1,164 @@
+# intraday.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import config
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def yfinance_intraday(ticker, start, end, interval):
+    """Default fetch: intraday bars for [start, end) from yfinance; raises instead of returning nothing"""
+    return yf.Ticker(ticker).history(start=start, end=end, interval=interval, raise_errors=True)
+
+def fetch_intraday_chunks(ticker, start, end, interval, chunk_days=None, fetch_func=None, failures=None):
+    """Yield intraday bar frames for [start, end) ('YYYY-MM-DD'), a few days per request.
+
+    Chunks split on whole days, so only one chunk of bars is held at a time.
+    Weekend-only chunks are skipped. A chunk whose request fails or returns no
+    bars is appended to `failures` as (start, end, reason) and the rest still
+    load.
+    """
+    chunk_days = chunk_days or config.INTRADAY_CHUNK_DAYS.get(interval, 7)
+    fetch_func = fetch_func or yfinance_intraday
+    chunk_start = datetime.strptime(start, '%Y-%m-%d')
+    final_end = datetime.strptime(end, '%Y-%m-%d')
+    while chunk_start < final_end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), final_end)
+        span = (chunk_start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d'))
+        chunk_start = chunk_end
+        if len(pd.bdate_range(span[0], span[1], inclusive="left")) == 0:
+            continue
+        try:
+            bars = fetch_func(ticker, span[0], span[1], interval)
+        except Exception as e:
+            if failures is not None:
+                failures.append(span + (str(e),))
+            continue
+        if bars is None or bars.empty:
+            if failures is not None:
+                failures.append(span + ("no bars returned",))
+            continue
+        yield bars
+
+
+class SessionAggregator:
+    """Reduces a stream of intraday bars to one feature dict per trading session.
+
+    Feed bar frames in time order; every session that is known to be complete
+    (a later session has started) is summarized straight away and its bars
+    dropped. Only the bars of the session still in progress are carried over
+    to the next chunk.
+    """
+    def __init__(self, opening_range_minutes=None):
+        self.opening_range = pd.Timedelta(minutes=opening_range_minutes or config.INTRADAY_OPENING_RANGE_MINUTES)
+        self.pending = None
+
+    def feed(self, bars):
+        """Add a chunk of bars and return the features of sessions it completed"""
+        bars = bars[['High', 'Low', 'Close', 'Volume']]
+        if self.pending is not None:
+            bars = pd.concat([self.pending, bars])
+        if bars.empty:
+            return []
+
+        days = bars.index.normalize()
+        boundaries = np.flatnonzero(days[1:] != days[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(bars)]))
+
+        sessions = [self._summarize(bars.iloc[s:e]) for s, e in zip(starts[:-1], ends[:-1])]
+        self.pending = bars.iloc[starts[-1]:]
+        return sessions
+
+    def close(self):
+        """Summarize the final session"""
+        if self.pending is None or self.pending.empty:
+            return []
+        sessions = [self._summarize(self.pending)]
+        self.pending = None
+        return sessions
+
+    def _summarize(self, bars):
+        index = bars.index
+        high = bars['High'].to_numpy(dtype=float)
+        low = bars['Low'].to_numpy(dtype=float)
+        close = bars['Close'].to_numpy(dtype=float)
+        volume = bars['Volume'].to_numpy(dtype=float)
+        total_volume = volume.sum()
+
+        opening = index < index[0] + self.opening_range
+        range_high, range_low = high[opening].max(), low[opening].min()
+
+        typical = (high + low + close) / 3
+        cumulative_volume = np.cumsum(volume)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            running_vwap = np.cumsum(typical * volume) / cumulative_volume
+        vwap = running_vwap[-1] if total_volume > 0 else typical.mean()
+        deviations = close / np.where(np.isfinite(running_vwap), running_vwap, typical) - 1
+
+        log_returns = np.diff(np.log(close))
+        last_close = close[-1]
+        if last_close > range_high:
+            breakout = "above"
+        elif last_close < range_low:
+            breakout = "below"
+        else:
+            breakout = "inside"
+
+        # Volume profile: how much traded in the first and last hour of the session
+        first_hour = index < index[0] + HOUR
+        last_hour = (index > index[-1] - HOUR) & ~first_hour
+        open_share = volume[first_hour].sum() / total_volume if total_volume > 0 else 0.0
+        close_share = volume[last_hour].sum() / total_volume if total_volume > 0 else 0.0
+
+        return {
+            "date": index[0].strftime('%m-%d-%Y'),
+            "bars": len(close),
+            "open_range_high": range_high,
+            "open_range_low": range_low,
+            "open_range_pct": (range_high - range_low) / range_low,
+            "close": last_close,
+            "breakout": breakout,
+            "vwap": vwap,
+            "vwap_deviation": last_close / vwap - 1,
+            "max_vwap_deviation": float(deviations[np.abs(deviations).argmax()]),
+            "intraday_vol": float(log_returns.std(ddof=1) * np.sqrt(len(log_returns))) if len(log_returns) > 1 else 0.0,
+            "high": high.max(),
+            "low": low.min(),
+            "volume": int(total_volume),
+            "volume_open_share": open_share,
+            "volume_close_share": close_share,
+        }
+
+
+def format_intraday_summary(sessions, interval, detail_sessions=None):
+    """Render session features as text: window averages, then one line per recent session"""
+    detail_sessions = detail_sessions or config.INTRADAY_DETAIL_SESSIONS
+    if not sessions:
+        return ""
+
+    def avg(key):
+        return float(np.mean([session[key] for session in sessions]))
+
+    breakouts = [session["breakout"] for session in sessions]
+    lines = [
+        f"Intraday window: {sessions[0]['date']} to {sessions[-1]['date']} ({len(sessions)} sessions of {interval} bars)",
+        f"Averages: opening range {avg('open_range_pct') * 100:.2f}%, close vs VWAP {avg('vwap_deviation') * 100:+.2f}%, "
+        f"intraday volatility {avg('intraday_vol') * 100:.2f}%, volume {int(avg('volume'))}",
+        f"Closes vs opening range: {breakouts.count('above')} above, {breakouts.count('below')} below, "
+        f"{breakouts.count('inside')} inside",
+    ]
+    if len(sessions) > detail_sessions:
+        lines.append(f"Last {detail_sessions} sessions:")
+    for s in sessions[-detail_sessions:]:
+        lines.append(
+            f"{s['date']}: close {s['close']:.2f} ({s['breakout']} opening range {s['open_range_low']:.2f}-{s['open_range_high']:.2f}), "
+            f"VWAP {s['vwap']:.2f} (close {s['vwap_deviation'] * 100:+.2f}%, max {s['max_vwap_deviation'] * 100:+.2f}%), "
+            f"intraday vol {s['intraday_vol'] * 100:.2f}%, volume {s['volume']} "
+            f"(first hour {s['volume_open_share'] * 100:.0f}%, last hour {s['volume_close_share'] * 100:.0f}%)"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,124 @@
+# llm_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import config
+from sqlite_store import connect
+
+
+class LLMCache:
+    """On-disk SQLite cache of model responses keyed by a hash of the full request.
+
+    Entries expire per task (`ttls` maps task -> seconds, 0 disables caching
+    for that task) and the least recently used ones are evicted once the
+    stored responses exceed `max_bytes`. Hit/miss counters are kept per process.
+    """
+    def __init__(self, path=None, ttls=None, max_bytes=None):
+        self.path = path or os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, "llm_cache.sqlite3")
+        self.ttls = config.LLM_CACHE_TTLS if ttls is None else ttls
+        self.max_bytes = max_bytes or config.LLM_CACHE_MAX_BYTES
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    task TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+
+    def _connect(self):
+        return connect(self.path)
+
+    def ttl_for(self, task):
+        return self.ttls.get(task, 0)
+
+    @staticmethod
+    def make_key(task, params):
+        """Hash everything that can change the answer: task, model, sampling and messages"""
+        payload = json.dumps({"task": task, **params}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, task):
+        """Return the cached response for `key`, or None on a miss or expiry"""
+        ttl = self.ttl_for(task)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] <= ttl:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                with self.lock:
+                    self.hits += 1
+                return row[0]
+            if row is not None:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, task, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, task, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, task, response, size, now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        with self.lock:
+            self.evictions += evicted
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current number of entries"""
+        with self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": total,
+            }
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
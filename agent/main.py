@@ -9,7 +9,6 @@ from openai import OpenAI
 import json
 import feedparser
 import requests
-from bs4 import BeautifulSoup
 import tiktoken
 import re
 import pytz  
@@ -24,10 +23,15 @@ from email import encoders
 # Import the new modules
 from model_manager import ModelManager
 from ticker_resolver import resolve_ticker
+from ticker_autocomplete import get_ticker_completer
 from financial_analyzer import generate_financial_report
+from html_extractor import extract_paragraphs
 from news_processor import fetch_macroeconomic_news, get_news_json, scrape_and_cache_articles
-from stock_data import generate_stock_cache
-from ppt_generator import create_ppt, create_slide_previews, convert_ppt_to_images
+from stock_data import generate_intraday_cache, generate_peer_summary, generate_stock_cache
+from ppt_generator import create_ppt, create_section_preview, create_slide_previews, convert_ppt_to_images
+from stage_executor import Stage, StageError, run_stages
+from rate_limiter import get_host_rate_limiter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 import ssl
 import certifi
@@ -164,10 +168,8 @@ def chatgpt_api_call(prompt, api_key, model=config.DEFAULT_OPENAI_MODEL, max_tok
 def extract_news_content(url):
     try:
         response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-        soup = BeautifulSoup(response.text, "lxml")
-        paragraphs = soup.find_all('p')
-        content = "\n".join([para.get_text() for para in paragraphs])
-        return content.strip() if content else "⚠ Unable to extract article content."
+        content = extract_paragraphs(response.text)
+        return content if content else "⚠ Unable to extract article content."
     except Exception as e:
         return f"⚠ Extraction failed: {str(e)}"
 
@@ -224,6 +226,7 @@ def fetch_news(status_text):
         for idx, entry in enumerate(feed.entries[:3], start=1):
             counter += 1
             status_text.text(f"Reading macroeconomic data... {counter}")
+            get_host_rate_limiter().acquire(entry.link)
             full_content = extract_news_content(entry.link)
 
             article_data = {
@@ -233,7 +236,6 @@ def fetch_news(status_text):
                 "content": full_content
             }
             source_articles.append(article_data)
-            time.sleep(1)
 
         news_cache[source_name] = source_articles
 
@@ -283,7 +285,7 @@ def rank_articles(json_file_path, ticker, api_key, status_text, model=None):
 
     # Prepare a list of relevant articles for ranking
     relevant_articles = [
-        {"title": article["title"], "url": article["url"]}
+        {"title": article["title"], "url": article["url"], "cluster_size": article.get("cluster_size", 1)}
         for article in filtered_articles
     ]
 
@@ -297,6 +299,7 @@ def rank_articles(json_file_path, ticker, api_key, status_text, model=None):
     You are an AI assistant that ranks news articles based on their importance and relevance. 
     The articles are related to the stock ticker {ticker}. 
     Rank the following articles in order of priority (1 being the most important).
+    "cluster_size" is how many feeds carried the same story; widely syndicated stories tend to matter more.
     
     Articles:
     {json.dumps(relevant_articles, indent=2)}
@@ -694,6 +697,18 @@ def main():
         with ticker_col2:
             check_ticker_button = st.button("Check Ticker", key="check_ticker")
         
+        # Suggestions come from the local symbol index; picking one skips the Check Ticker round-trip
+        if ticker_input and not check_ticker_button:
+            suggestions = get_ticker_completer().complete(ticker_input, config.AUTOCOMPLETE_MAX_SUGGESTIONS)
+            if suggestions:
+                st.caption("Suggestions:")
+                suggestion_cols = st.columns(min(3, len(suggestions)))
+                for i, (symbol, name) in enumerate(suggestions):
+                    with suggestion_cols[i % len(suggestion_cols)]:
+                        if st.button(f"{symbol} - {name}", key=f"suggest_{symbol}"):
+                            st.session_state.validated_ticker = symbol
+                            st.experimental_rerun()
+        
         # Check if user has entered a ticker and clicked the button
         if check_ticker_button and ticker_input:
             api_key = os.getenv("OPENAI_API_KEY")
@@ -749,7 +764,9 @@ def main():
         else:
             ticker = st.text_input("Enter stock ticker symbol (e.g., AAPL, MSFT, TSLA):")
         
-        n_days = st.slider("Number of days to analyze:", 1, 30, 7)
+        n_days = st.slider("Number of days to analyze:", 1, config.MAX_N_DAYS, config.DEFAULT_N_DAYS)
+        price_interval = st.selectbox("Price bars:", config.PRICE_INTERVALS, index=0,
+                                      help="Intraday bars are summarized per session; 5m and 15m bars cover at most 60 days")
         
         submit_button = st.form_submit_button("Generate Analysis")
    
@@ -800,88 +817,129 @@ def main():
                 pass
             
             try:
-                # Step 1: Fetch macroeconomic news (15%)
-                status_text.text("Analyzing macroeconomic environment...")
-                debug_to_ui("Starting macroeconomic news fetch")
-                macro_news = fetch_macroeconomic_news(status_text, config.ECONOMY_RSS_FEEDS)
-                debug_to_ui(f"Fetched macro news: {len(str(macro_news))} characters")
-                progress_bar.progress(15)
-                
-                # Step 2: Get company news (30%)
-                status_text.text(f"Collecting insights for {ticker}...")
-                debug_to_ui(f"Starting news collection for {ticker}")
-                news_json = get_news_json(ticker, status_text, n_days, TEMP_DIR, config.NEWS_TOKEN_FILENAME_TEMPLATE, tracked_open)
-                if news_json is None:
-                    st.error(f"Failed to retrieve sufficient data for {ticker}. Unable to proceed with analysis.")
-                    debug_to_ui("News JSON retrieval failed")
+                # Stages 1-3 are independent and run in parallel; the rest wait on their inputs
+                def fetch_macro_stage():
+                    debug_to_ui("Starting macroeconomic news fetch")
+                    macro_news = fetch_macroeconomic_news(status_text, config.ECONOMY_RSS_FEEDS)
+                    debug_to_ui(f"Fetched macro news: {len(str(macro_news))} characters")
+                    return macro_news
+
+                def company_news_stage():
+                    debug_to_ui(f"Starting news collection for {ticker}")
+                    news_json = get_news_json(ticker, status_text, n_days, TEMP_DIR, config.NEWS_TOKEN_FILENAME_TEMPLATE, tracked_open)
+                    if news_json is None:
+                        debug_to_ui("News JSON retrieval failed")
+                        raise StageError(f"Failed to retrieve sufficient data for {ticker}. Unable to proceed with analysis.")
+                    debug_to_ui(f"News JSON saved to: {news_json}")
+                    return news_json
+
+                def stock_data_stage():
+                    debug_to_ui(f"Starting stock data retrieval for {ticker}")
+                    if price_interval == "1d":
+                        stock_cache = generate_stock_cache(ticker, n_days, status_text)
+                    else:
+                        stock_cache = generate_intraday_cache(ticker, n_days, price_interval, status_text)
+                    if stock_cache is None:
+                        debug_to_ui("Stock cache generation failed")
+                        raise StageError(f"No stock data found for {ticker}. Unable to proceed with analysis.")
+                    peer_summary = generate_peer_summary(ticker, n_days, None)
+                    if peer_summary:
+                        stock_cache += f"\n\nPeer comparison:\n{peer_summary}"
+                    debug_to_ui(f"Stock cache generated: {len(stock_cache)} characters")
+                    return stock_cache
+
+                def rank_stage(news_json):
+                    debug_to_ui(f"Starting article ranking using news file: {news_json}")
+                    ranked_json = rank_articles(news_json, ticker, api_key, status_text, model=None)
+                    # Check if we have ranked articles before proceeding
+                    if ranked_json is None:
+                        debug_to_ui("Article ranking failed - no ranked_json returned")
+                        raise StageError("Insufficient relevant data found. Unable to proceed with analysis.")
+                    debug_to_ui(f"Articles ranked and saved to: {ranked_json}")
+                    return ranked_json
+
+                def scrape_stage(rank):
+                    debug_to_ui(f"Starting content extraction from file: {rank}")
+                    cached_data = scrape_and_cache_articles(json_file_path=rank, 
+                                                        ticker=ticker, 
+                                                        status_text=status_text,
+                                                        max_tokens_news_scraping=config.MAX_TOKENS_NEWS_SCRAPING,
+                                                        tracked_open_func=tracked_open)
+                    debug_to_ui(f"Content extracted: {len(cached_data)} characters")
+                    return cached_data
+
+                # The analysis is streamed so each section's slide can be previewed as it arrives
+                live_placeholder = st.empty()
+                live_preview = live_placeholder.container()
+                section_previews = {}
+
+                def show_section(index, body):
+                    debug_to_ui(f"Section {index + 1} received: {len(body)} characters")
+                    preview = create_section_preview(index, body)
+                    if preview is not None:
+                        section_previews[index] = preview
+                        live_preview.image(preview, caption=f"Section {index + 1}", use_column_width=True)
+
+                def report_stage(scrape, macro_news, stock_data):
+                    debug_to_ui("Starting financial report generation")
+                    financial_report = generate_financial_report(ticker=ticker, 
+                                                            cached_data=scrape, 
+                                                            macro_news=macro_news, 
+                                                            stock_cache=stock_data, 
+                                                            api_key=api_key, 
+                                                            status_text=status_text,
+                                                            on_section=show_section)
+                    debug_to_ui(f"Financial report generated: {len(financial_report)} characters")
+                    return financial_report
+
+                def ppt_stage(report):
+                    debug_to_ui("Starting PowerPoint creation")
+                    ppt_file = create_ppt(ticker, report, status_text)
+                    debug_to_ui(f"PowerPoint saved to: {ppt_file}")
+                    return ppt_file
+
+                # Worker threads need the script context to update Streamlit elements
+                script_ctx = get_script_run_ctx()
+                def attach_script_ctx():
+                    add_script_run_ctx(threading.current_thread(), script_ctx)
+
+                stages = [
+                    Stage("macro_news", fetch_macro_stage, progress=15,
+                          status_message="Analyzing macroeconomic environment..."),
+                    Stage("news_json", company_news_stage, progress=15,
+                          status_message=f"Collecting insights for {ticker}..."),
+                    Stage("stock_data", stock_data_stage, progress=10,
+                          status_message=f"Processing market data for {ticker}..."),
+                    Stage("rank", rank_stage, depends_on=["news_json"], progress=10,
+                          status_message="Prioritizing relevant information..."),
+                    Stage("scrape", scrape_stage, depends_on=["rank"], progress=10,
+                          status_message="Extracting financial insights..."),
+                    Stage("report", report_stage, depends_on=["scrape", "macro_news", "stock_data"], progress=20,
+                          status_message="Generating comprehensive financial analysis..."),
+                    Stage("ppt", ppt_stage, depends_on=["report"], progress=20,
+                          status_message="Creating PowerPoint presentation..."),
+                ]
+
+                try:
+                    results = run_stages(stages, progress_bar=progress_bar, status_text=status_text,
+                                         thread_initializer=attach_script_ctx)
+                except StageError as e:
+                    st.error(e.message)
+                    debug_to_ui(f"Stage '{e.stage_name}' failed: {e.message}")
                     return
-                debug_to_ui(f"News JSON saved to: {news_json}")
-                progress_bar.progress(30)
-                
-                # Step 3: Get stock data (40%)
-                status_text.text(f"Processing market data for {ticker}...")
-                debug_to_ui(f"Starting stock data retrieval for {ticker}")
-                stock_cache = generate_stock_cache(ticker, n_days, status_text)
-                if stock_cache is None:
-                    st.error(f"No stock data found for {ticker}. Unable to proceed with analysis.")
-                    debug_to_ui("Stock cache generation failed")
-                    return
-                # Step 3: Get stock data (40%) - continued
-                debug_to_ui(f"Stock cache generated: {len(stock_cache)} characters")
-                progress_bar.progress(40)
-                
-                # Step 4: Rank articles (50%)
-                status_text.text("Prioritizing relevant information...")
-                debug_to_ui(f"Starting article ranking using news file: {news_json}")
 
-                ranked_json = rank_articles(news_json, ticker, api_key, status_text, model=None)
-                progress_bar.progress(50)
-                
-                # Check if we have ranked articles before proceeding
-                if ranked_json is None:
-                    st.error("Insufficient relevant data found. Unable to proceed with analysis.")
-                    debug_to_ui("Article ranking failed - no ranked_json returned")
-                    return
-                debug_to_ui(f"Articles ranked and saved to: {ranked_json}")
-                
-                # Step 5: Scrape article content (60%)
-                status_text.text("Extracting financial insights...")
-                debug_to_ui(f"Starting content extraction from file: {ranked_json}")
-                cached_data = scrape_and_cache_articles(json_file_path=ranked_json, 
-                                                    ticker=ticker, 
-                                                    status_text=status_text,
-                                                    max_tokens_news_scraping=config.MAX_TOKENS_NEWS_SCRAPING,
-                                                    tracked_open_func=tracked_open)
-                
-                debug_to_ui(f"Content extracted: {len(cached_data)} characters")
-                progress_bar.progress(60)
-                
-                # Step 6: Generate financial report (80%)
-                status_text.text("Generating comprehensive financial analysis...")
-                debug_to_ui("Starting financial report generation")
-                financial_report = generate_financial_report(ticker=ticker, 
-                                                        cached_data=cached_data, 
-                                                        macro_news=macro_news, 
-                                                        stock_cache=stock_cache, 
-                                                        api_key=api_key, 
-                                                        status_text=status_text)
-                
-                debug_to_ui(f"Financial report generated: {len(financial_report)} characters")
-                progress_bar.progress(80)
-                
-                # Step 7: Create PowerPoint presentation (100%)
-                status_text.text("Creating PowerPoint presentation...")
-                debug_to_ui("Starting PowerPoint creation")
-                ppt_file = create_ppt(ticker, financial_report, status_text)
-                debug_to_ui(f"PowerPoint saved to: {ppt_file}")
-                progress_bar.progress(100)
+                news_json = results["news_json"]
+                ranked_json = results["rank"]
+                financial_report = results["report"]
+                ppt_file = results["ppt"]
                 
                 # Show completion message
+                live_placeholder.empty()
                 st.success(f"✅ Analysis of {ticker} completed successfully!")
                 
-                # Generate slide previews
+                # Generate slide previews, reusing the ones rendered while streaming
                 status_text.text("Generating slide previews...")
-                slide_images = create_slide_previews(ticker, financial_report)
+                slide_images = create_slide_previews(ticker, financial_report, section_previews)
                 
                 # Display slide previews
                 if slide_images:
@@ -2,10 +2,18 @@
 from openai import OpenAI
 import os
 
+import config
+from llm_cache import get_llm_cache
+from resilience import call_with_resilience, get_circuit_breaker, get_model_semaphore
+
 class ModelManager:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, use_cache=None, base_url=None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are handled by call_with_resilience, so the client's own are disabled
+        self.client = OpenAI(api_key=self.api_key, base_url=base_url or config.OPENAI_BASE_URL, max_retries=0)
+        # Response caching is opt-in via config.LLM_CACHE_ENABLED or use_cache=True
+        use_cache = config.LLM_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache = get_llm_cache() if use_cache else None
         
         # Define model configurations for different tasks
         self.model_configs = {
@@ -36,8 +44,7 @@ class ModelManager:
             }
         }
     
-    def invoke_model(self, task, prompt, system_message=None, response_format=None):
-        """Invoke the appropriate model for a given task"""
+    def _build_params(self, task, prompt, system_message=None, response_format=None):
         if task not in self.model_configs:
             raise ValueError(f"Unknown task: {task}. Available tasks: {list(self.model_configs.keys())}")
         
@@ -65,9 +72,63 @@ class ModelManager:
         if response_format:
             params["response_format"] = response_format
         
+        return params
+    
+    def invoke_model(self, task, prompt, system_message=None, response_format=None):
+        """Invoke the appropriate model for a given task"""
+        params = self._build_params(task, prompt, system_message, response_format)
+        
+        cache_key = None
+        if self.cache and self.cache.ttl_for(task) > 0:
+            cache_key = self.cache.make_key(task, params)
+            cached = self.cache.get(cache_key, task)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.client.chat.completions.create(**params)
-            return response.choices[0].message.content
+            response = call_with_resilience(params["model"], lambda: self.client.chat.completions.create(**params))
+            content = response.choices[0].message.content
+            if cache_key and content is not None:
+                self.cache.put(cache_key, task, content)
+            return content
         except Exception as e:
             print(f"Error calling model for task '{task}': {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def stream_model(self, task, prompt, system_message=None, response_format=None):
+        """Invoke the model for a task in streaming mode, yielding text as it is generated"""
+        params = self._build_params(task, prompt, system_message, response_format)
+        
+        cache_key = None
+        if self.cache and self.cache.ttl_for(task) > 0:
+            cache_key = self.cache.make_key(task, params)
+            cached = self.cache.get(cache_key, task)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        try:
+            # Hold the model's concurrency slot for the whole stream, not just the request
+            with get_model_semaphore(params["model"]):
+                stream = call_with_resilience(params["model"],
+                                              lambda: self.client.chat.completions.create(**params, stream=True),
+                                              acquire_slot=False)
+                try:
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                except Exception:
+                    # The request succeeded but the stream broke off; that counts against the endpoint too
+                    get_circuit_breaker(params["model"]).record_failure()
+                    raise
+        except Exception as e:
+            print(f"Error streaming model for task '{task}': {str(e)}")
+            raise
+        
+        if cache_key:
+            self.cache.put(cache_key, task, "".join(parts))
@@ -0,0 +1,122 @@
+# news_dedup.py
+import base64
+import hashlib
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import config
+from article_store import canonical_url
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "guccounter", "ocid", "cmpid", "ncid", "soc_src",
+                   "soc_trk", "mc_cid", "mc_eid", "yptr", "__source", "taid", ".tsrc"}
+TRACKING_PREFIXES = ("utm_", "guce_", "mbid")
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+TAG_PATTERN = re.compile(r"<[^>]+>")
+# Google News appends " - Publisher" to every title
+PUBLISHER_SUFFIX = re.compile(r"\s+-\s+[^-]{1,60}$")
+
+
+def _unwrap_google_url(parts):
+    """Target of a Google redirect link, or None if it cannot be recovered offline"""
+    host = parts.netloc.lower()
+    if not host.endswith("google.com"):
+        return None
+    query = dict(parse_qsl(parts.query))
+    for key in ("url", "q"):
+        if query.get(key, "").startswith("http"):
+            return query[key]
+
+    # Older /rss/articles/<id> ids are base64 protobufs that embed the article URL;
+    # newer ids are opaque and have to stay as Google links
+    match = re.match(r"/(?:rss/)?articles/([A-Za-z0-9_-]+)", parts.path)
+    if match:
+        encoded = match.group(1)
+        try:
+            decoded = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        except ValueError:
+            return None
+        found = re.search(rb"https?://[\x21-\x7e]+", decoded)
+        if found:
+            return found.group(0).decode("ascii", errors="ignore")
+    return None
+
+def canonical_article_url(url):
+    """canonical_url, plus Google redirect links unwrapped and tracking parameters removed"""
+    parts = urlsplit(url.strip())
+    target = _unwrap_google_url(parts)
+    if target:
+        parts = urlsplit(target)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+    return canonical_url(urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment)))
+
+
+@lru_cache(maxsize=16384)
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash(text):
+    """64-bit SimHash over the words and word pairs of `text`"""
+    words = WORD_PATTERN.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    counts = [0] * 64
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(64):
+            counts[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if counts[bit] > 0)
+
+def title_fingerprint(title):
+    """SimHash of a headline without the publisher suffix"""
+    return simhash(PUBLISHER_SUFFIX.sub("", title or ""))
+
+def summary_fingerprint(summary):
+    """SimHash of a plain-text summary, or None when it is too short to identify a story"""
+    text = TAG_PATTERN.sub(" ", summary or "")
+    if len(WORD_PATTERN.findall(text.lower())) < config.NEWS_DEDUP_MIN_SUMMARY_WORDS:
+        return None
+    return simhash(text)
+
+def _within(a, b, max_distance):
+    return a is not None and b is not None and bin(a ^ b).count("1") <= max_distance
+
+
+def dedupe_articles(articles, max_distance=None):
+    """Collapse syndicated copies of the same story.
+
+    `articles` are dicts with "title", "url" and optionally "summary", in
+    priority order. Two articles are copies when their canonical URLs match,
+    their headline SimHashes are within `max_distance` bits, or both carry a
+    real summary and those are within `max_distance` bits (a rewritten
+    headline on the same wire story). Returns one representative per cluster,
+    in first-seen order, with "url" canonicalized and "cluster_size" set.
+    A copy linking straight to the publisher replaces a Google link.
+    """
+    max_distance = config.NEWS_DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+
+    clusters, by_url = [], {}
+    for article in articles:
+        article = dict(article, url=canonical_article_url(article["url"]))
+        title_fp = title_fingerprint(article.get("title", ""))
+        summary_fp = summary_fingerprint(article.get("summary", ""))
+
+        cluster = by_url.get(article["url"])
+        if cluster is None:
+            # Feeds hold tens of entries, so comparing against every cluster is cheap
+            cluster = next((c for c in clusters if _within(c["title_fp"], title_fp, max_distance)
+                            or _within(c["summary_fp"], summary_fp, max_distance)), None)
+
+        if cluster is None:
+            cluster = {"article": article, "title_fp": title_fp, "summary_fp": summary_fp, "size": 0}
+            clusters.append(cluster)
+        elif "news.google.com" in cluster["article"]["url"] and "news.google.com" not in article["url"]:
+            cluster["article"] = article
+        cluster["size"] += 1
+        by_url[article["url"]] = cluster
+
+    return [dict(cluster["article"], cluster_size=cluster["size"]) for cluster in clusters]
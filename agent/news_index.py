@@ -0,0 +1,182 @@
+# news_index.py
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import config
+from sqlite_store import connect
+
+
+class NewsIndex:
+    """Persistent SQLite index of news articles keyed by canonical URL.
+
+    Stores feed entries per ticker together with the accessibility probe
+    result, the extracted article text and its token count, so a repeat
+    report only probes and scrapes entries it has not seen before; entries
+    whose probe failed are probed again after NEWS_INDEX_REPROBE_SECONDS. Titles and
+    text are searchable through an FTS5 table when SQLite has FTS5 compiled
+    in; otherwise `search` falls back to LIKE matching.
+    """
+    def __init__(self, path=None, retention_days=None):
+        self.path = path or os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, "news_index.sqlite3")
+        self.retention = (retention_days or config.NEWS_INDEX_RETENTION_DAYS) * 24 * 3600
+        self.fts = True
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    summary TEXT,
+                    published TEXT,
+                    published_at REAL,
+                    first_seen REAL NOT NULL,
+                    title_tokens INTEGER,
+                    cluster_size INTEGER NOT NULL DEFAULT 1,
+                    accessible INTEGER,
+                    probe_bytes INTEGER,
+                    probed_at REAL,
+                    content TEXT,
+                    content_tokens INTEGER,
+                    fetched_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS article_tickers (
+                    ticker TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    PRIMARY KEY (ticker, url)
+                )
+            """)
+            # Indexes created before probes were bounded lack the probe size and time
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(articles)")}
+            if "probe_bytes" not in columns:
+                conn.execute("ALTER TABLE articles ADD COLUMN probe_bytes INTEGER")
+            if "probed_at" not in columns:
+                conn.execute("ALTER TABLE articles ADD COLUMN probed_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_at)")
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(url UNINDEXED, title, content)")
+            except sqlite3.OperationalError:
+                self.fts = False
+
+    def _connect(self):
+        return connect(self.path, sqlite3.Row)
+
+    def known(self, urls):
+        """Return {url: stored article dict} for the given canonical URLs that are already indexed"""
+        urls = list(urls)
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows = conn.execute(f"SELECT * FROM articles WHERE url IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((row["url"], dict(row)) for row in rows)
+        return found
+
+    def add(self, ticker, articles):
+        """Insert new feed entries for `ticker`; existing ones only gain the ticker and a larger cluster size.
+
+        Each article dict has "url", "title", and optionally "summary", "published",
+        "published_at" (epoch seconds), "title_tokens", "cluster_size", "accessible"
+        and "probe_bytes" (bytes the accessibility probe downloaded).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            for article in articles:
+                probed_at = None if article.get("accessible") is None else now
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO articles (url, title, summary, published, published_at, first_seen, "
+                    "title_tokens, cluster_size, accessible, probe_bytes, probed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (article["url"], article["title"], article.get("summary"), article.get("published"),
+                     article.get("published_at"), now, article.get("title_tokens"),
+                     article.get("cluster_size", 1), article.get("accessible"), article.get("probe_bytes"), probed_at),
+                ).rowcount
+                conn.execute("UPDATE articles SET cluster_size = MAX(cluster_size, ?) WHERE url = ?",
+                             (article.get("cluster_size", 1), article["url"]))
+                conn.execute("INSERT OR IGNORE INTO article_tickers (ticker, url) VALUES (?, ?)",
+                             (ticker.upper(), article["url"]))
+                if self.fts and inserted:
+                    conn.execute("INSERT INTO articles_fts (url, title, content) VALUES (?, ?, '')",
+                                 (article["url"], article["title"]))
+
+    def record_probe(self, url, accessible, probe_bytes):
+        """Store the result of probing an already indexed article again"""
+        with self._connect() as conn:
+            conn.execute("UPDATE articles SET accessible = ?, probe_bytes = ?, probed_at = ? WHERE url = ?",
+                         (accessible, probe_bytes, time.time(), url))
+
+    def needs_probe(self, row, max_age=None):
+        """True when an indexed article was never found accessible and its last probe is older than `max_age` seconds"""
+        max_age = config.NEWS_INDEX_REPROBE_SECONDS if max_age is None else max_age
+        return not row["accessible"] and (row["probed_at"] or 0) < time.time() - max_age
+
+    def record_content(self, url, content, tokens):
+        """Store the extracted text of an article and its token count"""
+        with self._connect() as conn:
+            conn.execute("UPDATE articles SET content = ?, content_tokens = ?, accessible = 1, fetched_at = ? WHERE url = ?",
+                         (content, tokens, time.time(), url))
+            if self.fts:
+                conn.execute("UPDATE articles_fts SET content = ? WHERE url = ?", (content, url))
+
+    def get_content(self, url):
+        """Return (content, tokens) for an already extracted article, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT content, content_tokens FROM articles WHERE url = ? AND content IS NOT NULL",
+                               (url,)).fetchone()
+        return (row["content"], row["content_tokens"]) if row else None
+
+    def window(self, ticker, since, limit=None):
+        """Articles for `ticker` published at or after `since` (epoch seconds), newest first, at most `limit`"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT a.* FROM articles a JOIN article_tickers t ON t.url = a.url "
+                "WHERE t.ticker = ? AND a.published_at >= ? ORDER BY a.published_at DESC LIMIT ?",
+                (ticker.upper(), since, -1 if limit is None else limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query, ticker=None, limit=20):
+        """Full-text search over titles and extracted text; returns article dicts, best match first"""
+        with self._connect() as conn:
+            if self.fts:
+                sql = ("SELECT a.* FROM articles_fts f JOIN articles a ON a.url = f.url "
+                       "WHERE articles_fts MATCH ?")
+                params = [query]
+                order = " ORDER BY bm25(articles_fts)"
+            else:
+                sql = "SELECT a.* FROM articles a WHERE (a.title LIKE ? OR a.content LIKE ?)"
+                params = [f"%{query}%", f"%{query}%"]
+                order = " ORDER BY a.published_at DESC"
+            if ticker:
+                sql += " AND a.url IN (SELECT url FROM article_tickers WHERE ticker = ?)"
+                params.append(ticker.upper())
+            rows = conn.execute(sql + order + " LIMIT ?", params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def prune(self):
+        """Drop articles first seen longer ago than the retention period"""
+        cutoff = time.time() - self.retention
+        with self._connect() as conn:
+            stale = "SELECT url FROM articles WHERE first_seen < ?"
+            conn.execute(f"DELETE FROM article_tickers WHERE url IN ({stale})", (cutoff,))
+            if self.fts:
+                conn.execute(f"DELETE FROM articles_fts WHERE url IN ({stale})", (cutoff,))
+            conn.execute("DELETE FROM articles WHERE first_seen < ?", (cutoff,))
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_news_index():
+    """Return the process-wide news index"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = NewsIndex()
+        return _default_index
@@ -1,20 +1,22 @@
 # news_processor.py
 import requests
-from bs4 import BeautifulSoup
 import feedparser
 import json
 from datetime import datetime, timedelta
 import pytz
 import os
 import time
-import re
-import tiktoken
 
-def num_tokens_from_string(string, encoding_name="cl100k_base"):
-    """Returns the number of tokens in a text string."""
-    encoding = tiktoken.get_encoding(encoding_name)
-    num_tokens = len(encoding.encode(string))
-    return num_tokens
+import config
+from article_store import get_article_store
+from feed_cache import parse_feed
+from news_dedup import dedupe_articles
+from news_index import get_news_index
+from extraction_pool import get_extraction_pool
+from fetch_engine import get_fetch_engine
+from html_extractor import ARTICLE_START_PATTERN, extract_paragraphs, has_article
+from rate_limiter import get_host_rate_limiter
+from token_counter import num_tokens_from_strings
 
 def extract_date(date_string):
     try:
@@ -23,13 +25,14 @@ def extract_date(date_string):
     except ValueError:
         return None
 
+def parse_news_content(html):
+    content = extract_paragraphs(html)
+    return content if content else "⚠ Unable to extract article content."
+
 def extract_news_content(url):
     try:
         response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-        soup = BeautifulSoup(response.text, "lxml")
-        paragraphs = soup.find_all('p')
-        content = "\n".join([para.get_text() for para in paragraphs])
-        return content.strip() if content else "⚠ Unable to extract article content."
+        return parse_news_content(response.text)
     except Exception as e:
         return f"⚠ Extraction failed: {str(e)}"
 
@@ -37,16 +40,38 @@ def fetch_macroeconomic_news(status_text, economy_rss_feeds):
     news_cache = {}
     counter = 0
 
+    entries_by_source = {}
     for source_name, rss_url in economy_rss_feeds.items():
-        feed = feedparser.parse(rss_url)
+        feed = parse_feed(rss_url)
+        entries_by_source[source_name] = feed.entries[:3]
+
+    # Articles on different hosts download in parallel; the per-host limiter
+    # keeps requests to the same domain politely spaced
+    links = [entry.link for entries in entries_by_source.values() for entry in entries]
+    responses = get_fetch_engine().fetch_ordered(links, headers={'User-Agent': 'Mozilla/5.0'},
+                                                 rate_limiter=get_host_rate_limiter())
+    # Pages are parsed in the shared extraction pool while later ones download
+    extractions = get_extraction_pool().extract_responses(responses, kind="paragraphs")
+
+    for source_name, entries in entries_by_source.items():
         source_articles = []
 
-        for idx, entry in enumerate(feed.entries[:3], start=1):
+        for idx, entry in enumerate(entries, start=1):
             counter += 1
             if status_text:
                 status_text.text(f"Reading macroeconomic data... {counter}")
             
-            full_content = extract_news_content(entry.link)
+            response, extraction = next(extractions)
+            if response.error:
+                full_content = f"⚠ Extraction failed: {response.error}"
+            elif extraction is None:
+                full_content = "⚠ Unable to extract article content."
+            else:
+                try:
+                    content, _ = extraction.result()
+                    full_content = content if content else "⚠ Unable to extract article content."
+                except Exception as e:
+                    full_content = f"⚠ Extraction failed: {str(e)}"
 
             article_data = {
                 "title": entry.title,
@@ -55,26 +80,30 @@ def fetch_macroeconomic_news(status_text, economy_rss_feeds):
                 "content": full_content
             }
             source_articles.append(article_data)
-            time.sleep(1)
 
         news_cache[source_name] = source_articles
 
     return news_cache
 
-def scrape_news(url):
+def scrape_news(url, article_store=None):
+    """Probe `url` for an article body; returns (accessible, bytes transferred).
+
+    Only the start of the page is streamed, stopping at the first body container.
+    """
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
-    try:
-        response = requests.get(url, headers=headers, timeout=1)
-        if response.status_code != 200:
-            return 0
+    response = get_fetch_engine().fetch_prefix(url, stop_pattern=ARTICLE_START_PATTERN, headers=headers)
+    # A short page read to the end is reused as is; a prefix is kept only if the scrape stage can resume it
+    if article_store is not None:
+        article_store.put(url, response)
+    if not response.ok:
+        return 0, response.bytes_read
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        article = soup.find("article") or soup.find("div", {"class": "content"})
-        return 1 if article else 0
-    except:
-        return 0
+    try:
+        return (1 if has_article(response.content, response.encoding) else 0), response.bytes_read
+    except Exception:
+        return 0, response.bytes_read
 
 def get_news_json(ticker, status_text, n_days, temp_dir, news_token_filename_template, tracked_open_func=open):
     token_data = []
@@ -91,10 +120,12 @@ def get_news_json(ticker, status_text, n_days, temp_dir, news_token_filename_tem
     ]
 
     total_found = 0
+    article_store = get_article_store()
+    feed_entries = []
     
     for rss_url in rss_urls:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = parse_feed(rss_url)
             if not feed.entries:
                 continue
                 
@@ -103,33 +134,74 @@ def get_news_json(ticker, status_text, n_days, temp_dir, news_token_filename_tem
             total_found += len(feed.entries)
 
             for entry in feed.entries:
-                pub_date = entry.published if "published" in entry else "No Date"
-                article_datetime = extract_date(pub_date)
-                
-                is_in_interval = True
-                if not article_datetime or article_datetime < threshold_date:
-                    is_in_interval = False
-
-                article_url = entry.link
-                accessible = scrape_news(article_url)
-
-                if status_text:
-                    status_text.text(f'Discovering articles about {ticker}...')
-                
-                article_tokens = num_tokens_from_string(entry.title)
-
-                token_data.append({
+                feed_entries.append({
                     "title": entry.title,
-                    "url": article_url,
-                    "tokens": article_tokens,
-                    "date": pub_date.strip(),
-                    "rank": None,
-                    "out_of_interval": 0 if is_in_interval else 1,
-                    "accessible": accessible
+                    "url": entry.link,
+                    "summary": entry.get("summary", ""),
+                    "published": entry.published if "published" in entry else "No Date"
                 })
         except Exception as e:
             if status_text:
                 status_text.text(f"Error fetching from {rss_url}: {str(e)}")
+
+    # Syndicated copies across feeds are collapsed before any of them is probed or ranked
+    articles = dedupe_articles(feed_entries)
+    if status_text and len(articles) < len(feed_entries):
+        status_text.text(f"Collapsed {len(feed_entries) - len(articles)} duplicate articles about {ticker}")
+
+    # Entries indexed by an earlier report keep a successful probe result; new ones are probed,
+    # and failed probes are retried once they are old enough, as the page may have been down briefly
+    news_index = get_news_index()
+    known = news_index.known(article["url"] for article in articles)
+    new_articles = [article for article in articles if article["url"] not in known]
+    reprobed = [article for article in articles
+                if article["url"] in known and news_index.needs_probe(known[article["url"]])]
+
+    for article in new_articles + reprobed:
+        article_datetime = extract_date(article["published"])
+        article["published_at"] = article_datetime.timestamp() if article_datetime else None
+        article["accessible"], article["probe_bytes"] = scrape_news(article["url"], article_store)
+
+        if status_text:
+            status_text.text(f'Discovering articles about {ticker}...')
+
+    for article in reprobed:
+        news_index.record_probe(article["url"], article["accessible"], article["probe_bytes"])
+
+    if status_text and (new_articles or reprobed):
+        probe_kb = sum(article["probe_bytes"] for article in new_articles + reprobed) / 1024
+        status_text.text(f"Probed {len(new_articles)} new and {len(reprobed)} previously unreachable articles "
+                         f"about {ticker} ({probe_kb:.0f} KB read)")
+
+    title_tokens = num_tokens_from_strings([article["title"] for article in new_articles])
+    for article, tokens in zip(new_articles, title_tokens):
+        article["title_tokens"] = tokens
+
+    news_index.add(ticker, articles)
+    news_index.prune()
+
+    # Current feed entries are always kept (flagged when outside the window); the newest
+    # in-window articles from earlier reports are added up to a cap, since all of them
+    # go into a single ranking prompt
+    threshold = threshold_date.timestamp()
+    indexed = news_index.known(article["url"] for article in articles)
+    max_earlier = config.NEWS_INDEX_MAX_EARLIER_ARTICLES
+    earlier = [row for row in news_index.window(ticker, threshold, limit=len(indexed) + max_earlier)
+               if row["url"] not in indexed][:max_earlier]
+    indexed.update((row["url"], row) for row in earlier)
+
+    for row in indexed.values():
+        in_interval = row["published_at"] is not None and row["published_at"] >= threshold
+        token_data.append({
+            "title": row["title"],
+            "url": row["url"],
+            "tokens": row["title_tokens"],
+            "date": (row["published"] or "No Date").strip(),
+            "rank": None,
+            "out_of_interval": 0 if in_interval else 1,
+            "accessible": row["accessible"] or 0,
+            "cluster_size": row["cluster_size"]
+        })
     
     if not token_data:
         if status_text:
@@ -137,7 +209,7 @@ def get_news_json(ticker, status_text, n_days, temp_dir, news_token_filename_tem
         return None
         
     if status_text:
-        status_text.text(f"Processing articles for {ticker}")
+        status_text.text(f"Processing {len(token_data)} articles for {ticker} ({len(new_articles)} new)")
     
     filename = os.path.join(temp_dir, news_token_filename_template.format(ticker=ticker))
     
@@ -167,35 +239,63 @@ def scrape_and_cache_articles(json_file_path, ticker, status_text, max_tokens_ne
     success_counter = 0
     total_tokens = 0
     
-    for article in top_articles:
+    # Text extracted by an earlier report comes straight from the news index and
+    # pages already downloaded by the accessibility probe are reused (probed
+    # prefixes are resumed where the server allows it); the rest download
+    # concurrently but are consumed in rank order so the token budget below
+    # still favours the highest-ranked articles
+    article_store = get_article_store()
+    news_index = get_news_index()
+    indexed = [news_index.get_content(article["url"]) for article in top_articles]
+    stored = [article_store.get(article["url"]) if extracted is None else None
+              for article, extracted in zip(top_articles, indexed)]
+    missing = [article["url"] for article, extracted, hit in zip(top_articles, indexed, stored)
+               if extracted is None and hit is None]
+    prefixes = {url: article_store.get_prefix(url) for url in missing}
+    responses = get_fetch_engine().fetch_ordered(missing, prefixes=prefixes)
+
+    def pages():
+        # Every page still to be extracted, in rank order, stored or freshly downloaded
+        for article, extracted, hit in zip(top_articles, indexed, stored):
+            if extracted is not None:
+                continue
+            if hit is None:
+                hit = next(responses)
+                article_store.put(article["url"], hit)
+            yield hit
+
+    # Parsing runs in the shared extraction pool, a few pages ahead of this loop
+    extractions = get_extraction_pool().extract_responses(pages())
+
+    for article, extracted in zip(top_articles, indexed):
         title = article["title"]
         url = article["url"]
         scrape_counter += 1
         if status_text:
             status_text.text(f"Analyzing financial data ({scrape_counter}/{len(top_articles)})")
 
+        if extracted is not None:
+            content_extracted, article_tokens = extracted
+            if total_tokens + article_tokens > max_tokens_news_scraping:
+                break
+            total_tokens += article_tokens
+            success_counter += 1
+            cache_content.append(f"🔹 {title}\n🔗 {url}\n\n{content_extracted}\n{'-'*80}\n")
+            continue
+
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
+            response, extraction = next(extractions)
+
+            if response.error:
+                raise Exception(response.error)
 
             if response.status_code != 200:
                 continue
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            # Enhanced article body selection
-            article_body = soup.find("article") or \
-                           soup.find("div", class_=re.compile(r'(article|content|story|post)-?(body|content|text)', re.I)) or \
-                           soup.find("main")
-            
-            content_extracted = ""
-            if article_body:
-                paragraphs = article_body.find_all("p")
-                content_extracted = "\n".join([p.get_text(separator=' ', strip=True) for p in paragraphs])
-                
-                article_tokens = num_tokens_from_string(content_extracted)
+            # Article body: <article>, else a *-body/*-content div, else <main>
+            content_extracted, article_tokens = extraction.result()
+            if content_extracted is not None:
+                news_index.record_content(url, content_extracted, article_tokens)
                 
                 if total_tokens + article_tokens > max_tokens_news_scraping:
                     break 
@@ -213,6 +313,10 @@ def scrape_and_cache_articles(json_file_path, ticker, status_text, max_tokens_ne
                 status_text.text(f"Error scraping {url}: {str(e)}")
             continue
 
+    # Drop any downloads and extractions still queued once the token budget is spent
+    extractions.close()
+    responses.close()
+
     if not cache_content:
         if status_text:
             status_text.text("Failed to extract content from any of the articles")
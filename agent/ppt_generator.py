@@ -119,21 +119,30 @@ def create_slide_preview(slide_type, content, ticker=None):
     return buf.getvalue()
 
 
-def create_slide_previews(ticker, financial_report):
-    """Create preview images for all slides in the presentation"""
+# Preview slide type for each report section, in report order
+SECTION_SLIDE_TYPES = ["key_takeaways", "macro", "catalysts", "price_analysis", "recommendation"]
+
+
+def create_section_preview(index, section):
+    """Create the preview image for one report section, or None if it has no slide"""
+    if index >= len(SECTION_SLIDE_TYPES):
+        return None
+    return create_slide_preview(SECTION_SLIDE_TYPES[index], section.strip())
+
+
+def create_slide_previews(ticker, financial_report, section_previews=None):
+    """Create preview images for all slides in the presentation.
+
+    `section_previews` maps section index to an image already rendered while
+    the report was streaming; those sections are not drawn again.
+    """
+    section_previews = section_previews or {}
     slides = []
     slides.append(create_slide_preview("cover", None, ticker))
     sections = re.split(r'Section \d+: ', financial_report)[1:]
-    if len(sections) > 0:
-        slides.append(create_slide_preview("key_takeaways", sections[0].strip()))
-    if len(sections) > 1:
-        slides.append(create_slide_preview("macro", sections[1].strip()))
-    if len(sections) > 2:
-        slides.append(create_slide_preview("catalysts", sections[2].strip()))
-    if len(sections) > 3:
-        slides.append(create_slide_preview("price_analysis", sections[3].strip()))
-    if len(sections) > 4:
-        slides.append(create_slide_preview("recommendation", sections[4].strip()))
+    for index, section in enumerate(sections[:len(SECTION_SLIDE_TYPES)]):
+        preview = section_previews.get(index)
+        slides.append(preview if preview is not None else create_section_preview(index, section))
     return slides
 
 
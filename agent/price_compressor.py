@@ -0,0 +1,70 @@
+# price_compressor.py
+import pandas as pd
+
+import config
+from token_counter import num_tokens_from_string
+
+# Aggregation levels tried in order, from finest to coarsest
+PERIODS = [
+    ("W-FRI", "Week"),
+    ("M", "Month"),
+]
+
+
+def format_period_bars(data, freq, label):
+    """Aggregate daily bars into one OHLCV line per calendar period (e.g. week or month)"""
+    if data.empty:
+        return []
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    frame = data[['Open', 'High', 'Low', 'Close', 'Volume']].assign(Date=index)
+    grouped = frame.groupby(index.to_period(freq), sort=True)
+    bars = grouped.agg(
+        first=('Date', 'first'), last=('Date', 'last'), sessions=('Close', 'size'),
+        open=('Open', 'first'), high=('High', 'max'), low=('Low', 'min'),
+        close=('Close', 'last'), volume=('Volume', 'mean'),
+    )
+
+    lines = []
+    for bar in bars.itertuples(index=False):
+        lines.append(f"{label} {bar.first.strftime('%m-%d-%Y')} to {bar.last.strftime('%m-%d-%Y')} ({bar.sessions} sessions): "
+                     f"open {bar.open:.2f}, close {bar.close:.2f}, high {bar.high:.2f}, low {bar.low:.2f}, "
+                     f"avg volume {int(bar.volume)}")
+    return lines
+
+
+def compress_price_history(data, format_daily, token_budget=None, daily_sessions=None, min_daily_sessions=None):
+    """Render price history within a token budget.
+
+    The most recent `daily_sessions` stay at daily resolution (formatted by
+    `format_daily`) and older sessions are aggregated into weekly, then monthly
+    bars; a window no longer than `daily_sessions` is sent day by day. If the
+    result is still too long the daily tail shrinks towards
+    `min_daily_sessions` and, as a last resort, the oldest bars are dropped.
+    Tokens are counted with the same tokenizer as the prompts.
+    """
+    token_budget = token_budget or config.STOCK_CACHE_TOKEN_BUDGET
+    daily_sessions = daily_sessions or config.STOCK_CACHE_DAILY_SESSIONS
+    min_daily_sessions = min(daily_sessions, min_daily_sessions or config.STOCK_SUMMARY_RECENT_SESSIONS)
+
+    if len(data) <= daily_sessions:
+        text = format_daily(data)
+        if num_tokens_from_string(text) <= token_budget:
+            return text
+
+    candidate = None
+    recent = min(daily_sessions, len(data))
+    while True:
+        older, daily = data.iloc[:len(data) - recent], format_daily(data.iloc[len(data) - recent:])
+        for freq, label in PERIODS:
+            candidate = format_period_bars(older, freq, label) + [daily]
+            text = "\n".join(candidate)
+            if num_tokens_from_string(text) <= token_budget:
+                return text
+        if recent <= min_daily_sessions:
+            break
+        recent = max(min_daily_sessions, recent // 2)
+
+    # Still over budget with the coarsest bars: keep the most recent ones that fit
+    while len(candidate) > 1 and num_tokens_from_string("\n".join(candidate)) > token_budget:
+        candidate = candidate[1:]
+    return "\n".join(candidate)
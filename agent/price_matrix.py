@@ -0,0 +1,244 @@
+# price_matrix.py
+import glob
+import json
+import os
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import config
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+TRADING_DAYS_PER_YEAR = 252
+
+
+class PriceMatrix:
+    """Daily bars for a group of tickers as one dates x tickers x fields float64 array.
+
+    The array lives in a raw file opened with np.memmap, described by a small
+    JSON header (dates, tickers, fields, data file). Every Streamlit worker
+    that opens the same header maps the same pages read-only, so a peer group
+    is held in memory once however many processes use it. Missing bars are NaN.
+    """
+    def __init__(self, data, dates, tickers, fields, header=None):
+        self.data = data
+        self.dates = dates               # np.datetime64[D] array, ascending
+        self.tickers = tickers
+        self.fields = fields
+        self.header = header or {}
+        self.columns = {ticker: i for i, ticker in enumerate(tickers)}
+
+    @classmethod
+    def open(cls, header_path):
+        """Map an existing matrix read-only"""
+        with open(header_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        data_path = os.path.join(os.path.dirname(header_path), header["data_file"])
+        data = np.memmap(data_path, dtype=np.float64, mode="r", shape=tuple(header["shape"]))
+        return cls(data, np.array(header["dates"], dtype="datetime64[D]"), header["tickers"], header["fields"], header)
+
+    @classmethod
+    def write(cls, header_path, frames, fields=FIELDS, **header_fields):
+        """Write {ticker: DataFrame} as a new matrix and atomically point the header at it.
+
+        Each build gets its own data file, so processes that still map the
+        previous one keep a consistent view until they reopen the header. When
+        several processes rebuild at once, the header only moves to newer builds.
+        """
+        tickers = list(frames)
+        if not tickers:
+            raise ValueError("No price data to build a matrix from")
+        sessions = [cls._session_dates(frame.index) for frame in frames.values()]
+        dates = pd.DatetimeIndex(sorted(set().union(*sessions))) if sessions else pd.DatetimeIndex([])
+
+        root = os.path.dirname(header_path)
+        os.makedirs(root, exist_ok=True)
+        base = os.path.splitext(os.path.basename(header_path))[0]
+        stamp = time.time_ns()
+        data_file = f"{base}-{stamp}.f8"
+        shape = (len(dates), len(tickers), len(fields))
+
+        data = np.memmap(os.path.join(root, data_file), dtype=np.float64, mode="w+", shape=shape)
+        for i, (ticker, frame) in enumerate(frames.items()):
+            frame = frame.set_axis(sessions[i])
+            frame = frame[~frame.index.duplicated(keep="last")]
+            data[:len(dates), i, :] = frame.reindex(dates).reindex(columns=fields).to_numpy(dtype=np.float64)
+        data.flush()
+        del data
+
+        header = dict(header_fields, data_file=data_file, shape=list(shape), fields=list(fields),
+                      tickers=tickers, dates=[date.strftime("%Y-%m-%d") for date in dates])
+        current = cls._published_stamp(header_path)
+        if current is not None and current > stamp:
+            # A build started after this one is already published; keep it rather than roll the header back
+            os.remove(os.path.join(root, data_file))
+            return cls.open(header_path)
+        tmp_header = f"{header_path}.{stamp}.tmp"
+        with open(tmp_header, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp_header, header_path)
+
+        # Old data files are unlinked; on POSIX their pages stay valid for anyone still mapping them.
+        # Another process may have published a newer build since, so only files older than it go.
+        matrix = cls.open(header_path)
+        current = cls._build_stamp(matrix.header["data_file"])
+        for path in glob.glob(os.path.join(root, f"{base}-*.f8")):
+            file_stamp = cls._build_stamp(os.path.basename(path))
+            if file_stamp is not None and current is not None and file_stamp < current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return matrix
+
+    @classmethod
+    def _published_stamp(cls, header_path):
+        try:
+            with open(header_path, "r", encoding="utf-8") as f:
+                return cls._build_stamp(json.load(f)["data_file"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def _build_stamp(data_file):
+        # Data files are named "{base}-{time_ns}.f8"
+        try:
+            return int(os.path.splitext(data_file)[0].rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    @staticmethod
+    def _session_dates(index):
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.normalize()
+
+    def field(self, name, start=None):
+        """dates x tickers view of one field, optionally from `start` ('YYYY-MM-DD') on"""
+        offset = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D")))
+        return self.data[offset:len(self.dates), :, self.fields.index(name)]
+
+
+def _window_returns(close):
+    """Return from the first to the last valid close of each column (NaN if none)"""
+    valid = np.isfinite(close)
+    has_data = valid.any(axis=0)
+    columns = np.arange(close.shape[1])
+    first = valid.argmax(axis=0)
+    last = close.shape[0] - 1 - valid[::-1].argmax(axis=0)
+    returns = close[last, columns] / close[first, columns] - 1
+    return np.where(has_data, returns, np.nan)
+
+def _percentile_of(values, value):
+    """Percentile rank of `value` among `values`, counting ties as half"""
+    values = values[np.isfinite(values)]
+    if not len(values) or not np.isfinite(value):
+        return None
+    return float(((values < value).sum() + 0.5 * (values == value).sum()) / len(values) * 100)
+
+def _correlations(returns, target):
+    """Pearson correlation of column `target` with every column, over rows where both are present"""
+    x = returns[:, target][:, None]
+    mask = np.isfinite(x) & np.isfinite(returns)
+    counts = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0).sum(axis=0) / counts
+        y_mean = np.where(mask, returns, 0).sum(axis=0) / counts
+        dx = np.where(mask, x - x_mean, 0)
+        dy = np.where(mask, returns - y_mean, 0)
+        corr = (dx * dy).sum(axis=0) / np.sqrt((dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+    return np.where(counts >= 3, corr, np.nan)
+
+def cross_sectional_stats(matrix, ticker, start=None):
+    """Compare one ticker with the rest of its matrix over the window starting at `start`"""
+    if ticker not in matrix.columns:
+        raise ValueError(f"No price data for {ticker} in the peer matrix")
+    target = matrix.columns[ticker]
+    peers = [i for i in range(len(matrix.tickers)) if i != target]
+    close = np.asarray(matrix.field("Close", start))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_returns = np.diff(np.log(close), axis=0)
+    window_returns = _window_returns(close)
+    valid_counts = np.isfinite(log_returns).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Columns with fewer than two returns
+        volatility = np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+    volatility = np.where(valid_counts >= 2, volatility, np.nan)
+    correlations = _correlations(log_returns, target)
+
+    peer_returns, peer_volatility = window_returns[peers], volatility[peers]
+    has_peers = bool(np.isfinite(peer_returns).any())
+    return {
+        "ticker": ticker,
+        "peers": [matrix.tickers[i] for i in peers],
+        "sessions": int(np.isfinite(close[:, target]).sum()),
+        "window_return": float(window_returns[target]),
+        "peer_median_return": float(np.nanmedian(peer_returns)) if has_peers else None,
+        "relative_strength": float(window_returns[target] - np.nanmedian(peer_returns)) if has_peers else None,
+        "return_percentile": _percentile_of(window_returns, window_returns[target]),
+        "volatility": float(volatility[target]),
+        "peer_median_volatility": float(np.nanmedian(peer_volatility)) if np.isfinite(peer_volatility).any() else None,
+        "volatility_percentile": _percentile_of(volatility, volatility[target]),
+        "correlations": {matrix.tickers[i]: float(correlations[i]) for i in peers if np.isfinite(correlations[i])},
+    }
+
+def format_peer_summary(stats, group_name):
+    """Render cross-sectional stats as a compact text block for the analysis prompt"""
+    def pct(value):
+        return "n/a" if value is None or not np.isfinite(value) else f"{value * 100:+.2f}%"
+
+    def vol(value):
+        return "n/a" if value is None or not np.isfinite(value) else f"{value * 100:.2f}%"
+
+    def rank(value):
+        return "n/a" if value is None else f"percentile {value:.0f}"
+
+    lines = [
+        f"Peer group: {group_name} ({', '.join(stats['peers'])})",
+        f"Return: {stats['ticker']} {pct(stats['window_return'])}, peer median {pct(stats['peer_median_return'])}, "
+        f"relative strength {pct(stats['relative_strength'])} ({rank(stats['return_percentile'])} in group)",
+        f"Realized volatility (annualized): {vol(stats['volatility'])}, peer median {vol(stats['peer_median_volatility'])} "
+        f"({rank(stats['volatility_percentile'])} in group)",
+    ]
+    if stats["correlations"]:
+        ranked = sorted(stats["correlations"].items(), key=lambda item: -item[1])
+        lines.append("Daily return correlation: " + ", ".join(f"{peer} {corr:.2f}" for peer, corr in ranked))
+    return "\n".join(lines)
+
+
+def find_peer_group(ticker):
+    """Return (group name, tickers) for the configured peer group containing `ticker`, or (None, [])"""
+    ticker = ticker.upper()
+    for name, tickers in config.PEER_GROUPS.items():
+        if ticker in tickers:
+            return name, list(tickers)
+    return None, []
+
+def matrix_path(group_name):
+    file_name = "".join(c if c.isalnum() else "_" for c in group_name.lower()) + ".json"
+    return os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, "matrices", file_name)
+
+def get_peer_matrix(group_name, tickers, start, end, price_store, ticker=None):
+    """Open the group's shared matrix, rebuilding it from the price store when it does not cover [start, end).
+
+    A cached build that lacks `ticker` (e.g. because its download failed) is rebuilt too.
+    """
+    header_path = matrix_path(group_name)
+    try:
+        matrix = PriceMatrix.open(header_path)
+        header = matrix.header
+        if (header.get("end") == end and header.get("start") <= start
+                and set(tickers) <= set(header.get("requested", []))
+                and (ticker is None or ticker in matrix.columns)):
+            return matrix
+    except (OSError, ValueError, KeyError):
+        pass
+
+    frames, errors = price_store.get_histories(tickers, start, end)
+    for ticker, error in errors.items():
+        print(f"Error fetching peer data for {ticker}: {error}")
+    return PriceMatrix.write(header_path, frames, start=start, end=end, requested=list(tickers))
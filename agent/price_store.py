@@ -0,0 +1,283 @@
+# price_store.py
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytz
+import yfinance as yf
+
+import config
+
+
+def yfinance_history(ticker, start, end):
+    """Default fetch: daily bars for [start, end) from yfinance"""
+    return yf.Ticker(ticker).history(start=start, end=end, interval='1d')
+
+def yfinance_download(tickers, start, end):
+    """Default batch fetch: daily bars for many tickers in one yf.download call.
+
+    Returns ({ticker: frame}, {ticker: error message}).
+    """
+    # auto_adjust/actions match the columns and prices of Ticker.history
+    raw = yf.download(tickers, start=start, end=end, interval='1d', group_by='ticker',
+                      auto_adjust=True, actions=True, threads=True, progress=False)
+    reported = dict(getattr(getattr(yf, "shared", None), "_ERRORS", None) or {})
+
+    frames, errors = {}, {}
+    for ticker in tickers:
+        if raw is None or raw.empty:
+            # Nothing traded in the range (e.g. a weekend); not an error by itself
+            frame = pd.DataFrame()
+        elif isinstance(raw.columns, pd.MultiIndex):
+            frame = raw[ticker] if ticker in raw.columns.get_level_values(0) else None
+        else:
+            frame = raw if len(tickers) == 1 else None
+
+        # Tickers without bars come back as all-NaN rows on the shared date index
+        frame = frame.dropna(how="all") if frame is not None else None
+        if ticker in reported:
+            errors[ticker] = str(reported[ticker])
+        elif frame is None:
+            errors[ticker] = "No data returned"
+        else:
+            frames[ticker] = frame
+    return frames, errors
+
+
+def last_session_end(now=None):
+    """Exclusive end date ('YYYY-MM-DD') covering only US sessions that have finished.
+
+    Today's session counts once DAILY_BAR_FINAL_TIME has passed in the
+    market's time zone, whatever the server's own date is.
+    """
+    now = now or datetime.now(pytz.utc)
+    local = now.astimezone(pytz.timezone(config.US_MARKET_TIMEZONE))
+    final = datetime.strptime(config.DAILY_BAR_FINAL_TIME, "%H:%M").time()
+    day = local.date() + timedelta(days=1) if local.time() >= final else local.date()
+    return day.strftime('%Y-%m-%d')
+
+
+class PriceStore:
+    """Local Parquet store of daily OHLCV bars with incremental backfill.
+
+    Each ticker has a Parquet file of bars and a small JSON sidecar recording
+    the date range [start, end) already fetched; `end` is the high-water mark.
+    A fetch that comes back empty only counts as covered when its range has
+    no weekdays, since yfinance also returns nothing on transient errors.
+    The store never reaches past the last finished US session, so a bar for
+    a session still trading is not kept as final.
+
+    Bars are split- and dividend-adjusted as of the day they were fetched.
+    When newly fetched bars carry a split or dividend, every stored bar is
+    out of date, so the ticker's store is replaced by a fresh fetch of the
+    requested range.
+    A request only fetches the days outside that range (normally just the
+    trailing days since the last report) and is served as a slice of the store.
+
+    `fetch_func(ticker, start, end)` returns a DataFrame of daily bars for
+    [start, end); `batch_fetch_func(tickers, start, end)` returns
+    ({ticker: frame}, {ticker: error}). Both can be swapped out to run
+    without network access. Bars are indexed by session date (tz-naive).
+    """
+    def __init__(self, root=None, fetch_func=None, batch_fetch_func=None):
+        self.root = root or os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, "prices")
+        self.fetch_func = fetch_func or yfinance_history
+        self.batch_fetch_func = batch_fetch_func or yfinance_download
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock(self, ticker):
+        with self._locks_lock:
+            if ticker not in self._locks:
+                self._locks[ticker] = threading.Lock()
+            return self._locks[ticker]
+
+    def _paths(self, ticker):
+        name = re.sub(r'[^A-Z0-9.\-^=]', '_', ticker.upper())
+        return os.path.join(self.root, f"{name}.parquet"), os.path.join(self.root, f"{name}.json")
+
+    def _load(self, ticker):
+        data_path, meta_path = self._paths(ticker)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return pd.read_parquet(data_path), meta
+        except (OSError, ValueError):
+            return None, None
+
+    def _save(self, ticker, data, meta):
+        data_path, meta_path = self._paths(ticker)
+        # Write bars before the sidecar, each through a temp file, so a crash never
+        # leaves a high-water mark that claims bars the Parquet file does not have
+        tmp_data = data_path + ".tmp"
+        data.to_parquet(tmp_data)
+        os.replace(tmp_data, data_path)
+        tmp_meta = meta_path + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    @staticmethod
+    def _session_dates(frame):
+        # History is tz-aware and batch downloads are not; both reduce to the session date
+        index = frame.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        frame = frame.copy()
+        frame.index = index.normalize()
+        return frame
+
+    def _merge(self, frames):
+        frames = [self._session_dates(frame) for frame in frames if frame is not None and not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames)
+        data = data[~data.index.duplicated(keep="last")]
+        return data.sort_index()
+
+    @staticmethod
+    def _slice(data, start, end):
+        if data.empty:
+            return data
+        index = data.index
+        days = (index.tz_localize(None) if index.tz is not None else index).normalize()
+        mask = (days >= pd.Timestamp(start)) & (days < pd.Timestamp(end))
+        return data[mask]
+
+    @staticmethod
+    def _has_actions(frame):
+        if frame is None or frame.empty:
+            return False
+        columns = [column for column in ("Dividends", "Stock Splits") if column in frame.columns]
+        return bool(columns) and bool((frame[columns].fillna(0) != 0).to_numpy().any())
+
+    def _adjustment_changed(self, meta, fetched):
+        # A split or dividend after the stored range changes the adjusted prices of every stored bar
+        return meta is not None and any(start >= meta["end"] and self._has_actions(frame)
+                                        for start, _, frame in fetched)
+
+    @staticmethod
+    def _covered(range_start, range_end, frame):
+        # Empty weekday ranges may be failed fetches (or holidays) and are asked for again
+        if frame is not None and not frame.empty:
+            return True
+        return len(pd.bdate_range(range_start, range_end, inclusive="left")) == 0
+
+    @staticmethod
+    def _missing_ranges(meta, start, end):
+        if meta is None:
+            return [(start, end)]
+        ranges = []
+        if start >= end:
+            return ranges
+        if start < meta["start"]:
+            ranges.append((start, meta["start"]))
+        if end > meta["end"]:
+            ranges.append((meta["end"], end))
+        return ranges
+
+    def _extend(self, ticker, fetched, replace=False):
+        """Merge fetched (start, end, frame) pieces into the stored bars and widen the covered range.
+
+        With `replace`, the stored bars are discarded instead of merged.
+        """
+        data, meta = (None, None) if replace else self._load(ticker)
+        # Pieces are adjacent to the stored range, so the covered ones still form one range
+        bounds = [(start, end) for start, end, frame in fetched if self._covered(start, end, frame)]
+        if meta is not None:
+            bounds.append((meta["start"], meta["end"]))
+        data = self._merge([data] + [frame for _, _, frame in fetched])
+        if not data.empty and bounds:
+            meta = {"start": min(start for start, _ in bounds), "end": max(end for _, end in bounds)}
+            self._save(ticker, data, meta)
+        return data
+
+    def get_history(self, ticker, start, end):
+        """Return daily bars for [start, end) ('YYYY-MM-DD' strings), fetching only what is missing"""
+        ticker = ticker.upper()
+        end = min(end, last_session_end())
+        with self._lock(ticker):
+            data, meta = self._load(ticker)
+            ranges = self._missing_ranges(meta, start, end)
+            if ranges:
+                fetched = [(s, e, self.fetch_func(ticker, s, e)) for s, e in ranges]
+                if self._adjustment_changed(meta, fetched):
+                    data = self._extend(ticker, [(start, end, self.fetch_func(ticker, start, end))], replace=True)
+                else:
+                    data = self._extend(ticker, fetched)
+            return self._slice(data if data is not None else pd.DataFrame(), start, end)
+
+    def _batch_fetch(self, tickers, start, end):
+        try:
+            return self.batch_fetch_func(tickers, start, end)
+        except Exception as e:
+            return {}, {ticker: str(e) for ticker in tickers}
+
+    def get_histories(self, tickers, start, end):
+        """Return daily bars for many tickers, backfilling all of them with batched downloads.
+
+        Tickers missing the same date range are fetched together in one call.
+        Returns ({ticker: frame}, {ticker: error message}) so one bad symbol
+        does not fail the whole watchlist.
+        """
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        end = min(end, last_session_end())
+        frames, errors = {}, {}
+
+        groups, metas = {}, {}
+        for ticker in tickers:
+            _, metas[ticker] = self._load(ticker)
+            for date_range in self._missing_ranges(metas[ticker], start, end):
+                groups.setdefault(date_range, []).append(ticker)
+
+        fetched = {ticker: [] for ticker in tickers}
+        for (range_start, range_end), group in groups.items():
+            results, failures = self._batch_fetch(group, range_start, range_end)
+            for ticker in group:
+                if ticker in failures:
+                    errors[ticker] = failures[ticker]
+                else:
+                    fetched[ticker].append((range_start, range_end, results.get(ticker)))
+
+        # Tickers with a new split or dividend are fetched again in full, together
+        stale = [ticker for ticker in tickers
+                 if ticker not in errors and self._adjustment_changed(metas[ticker], fetched[ticker])]
+        if stale:
+            results, failures = self._batch_fetch(stale, start, end)
+            for ticker in stale:
+                if ticker in failures:
+                    errors[ticker] = failures[ticker]
+                else:
+                    fetched[ticker] = [(start, end, results.get(ticker))]
+
+        for ticker in tickers:
+            if ticker in errors:
+                continue
+            with self._lock(ticker):
+                if fetched[ticker]:
+                    data = self._extend(ticker, fetched[ticker], replace=ticker in stale)
+                else:
+                    data, _ = self._load(ticker)
+            window = self._slice(data if data is not None else pd.DataFrame(), start, end)
+            if window.empty:
+                errors[ticker] = "No price data in range"
+            else:
+                frames[ticker] = window
+        return frames, errors
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_price_store():
+    """Return the process-wide price store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
@@ -0,0 +1,55 @@
+# quote_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+
+class QuoteCache:
+    """Short-lived in-memory cache of ticker lookups, shared by every session.
+
+    Checking a ticker with yfinance is a slow multi-request call, and the same
+    symbols come up again and again (the direct check, the model's best match,
+    its alternatives, the next click). Entries expire after `ttl` seconds so
+    prices shown while resolving stay reasonably fresh.
+    """
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl or config.QUOTE_CACHE_TTL
+        self.max_entries = max_entries or config.QUOTE_CACHE_MAX_ENTRIES
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, ticker, info):
+        key = ticker.upper()
+        with self.lock:
+            self.entries[key] = (time.time(), info)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, ticker):
+        """Return the cached info for `ticker`, or None if missing or expired"""
+        key = ticker.upper()
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            stored_at, info = item
+            if time.time() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return info
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_quote_cache():
+    """Return the process-wide quote cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = QuoteCache()
+        return _default_cache
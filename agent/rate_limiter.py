@@ -0,0 +1,86 @@
+# rate_limiter.py
+import threading
+import time
+from urllib.parse import urlsplit
+
+import config
+
+
+class TokenBucket:
+    """Token bucket allowing `burst` immediate calls, then `rate` calls per second"""
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: each waiter queues behind the ones already reserved
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostRateLimiter:
+    """Keeps one token bucket per host so each domain is throttled independently.
+
+    `limits` maps a host (or parent domain, e.g. "cnbc.com") to a
+    `(requests_per_second, burst)` pair; unknown hosts use `default`.
+    """
+    def __init__(self, limits=None, default=None):
+        self.limits = {host.lower(): limit for host, limit in (limits or {}).items()}
+        self.default = default or (1.0, 1)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _limit_for(self, host):
+        parts = host.split(".")
+        # Most specific match wins: www.cnbc.com, then cnbc.com, then com
+        for i in range(len(parts)):
+            candidate = ".".join(parts[i:])
+            if candidate in self.limits:
+                return self.limits[candidate]
+        return self.default
+
+    def bucket(self, url_or_host):
+        host = urlsplit(url_or_host).netloc if "://" in url_or_host else url_or_host
+        host = host.lower()
+        with self.lock:
+            if host not in self.buckets:
+                rate, burst = self._limit_for(host)
+                self.buckets[host] = TokenBucket(rate, burst)
+            return self.buckets[host]
+
+    def reserve(self, url_or_host):
+        """Take a token for the host of `url_or_host` and return how long to wait before using it"""
+        return self.bucket(url_or_host).reserve()
+
+    def acquire(self, url_or_host):
+        """Block until the host of `url_or_host` may be contacted again"""
+        return self.bucket(url_or_host).acquire()
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+def get_host_rate_limiter():
+    """Return the process-wide limiter configured from config.HOST_RATE_LIMITS"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = HostRateLimiter(config.HOST_RATE_LIMITS, config.HOST_RATE_LIMIT_DEFAULT)
+        return _default_limiter
@@ -0,0 +1,50 @@
+# report_parser.py
+import re
+
+SECTION_HEADER = re.compile(r'Section \d+: ')
+
+
+def split_sections(financial_report):
+    """Split a finished report into section bodies, as the slide builders expect"""
+    return SECTION_HEADER.split(financial_report)[1:]
+
+
+class SectionStreamParser:
+    """Incrementally splits a streamed report on its `Section N: ` headers.
+
+    Feed text chunks as they arrive; each call returns the sections that were
+    completed by that chunk (a section is complete once the next header shows
+    up). `close()` returns the final section. Section bodies are exactly what
+    `split_sections` returns for the full text, indexed from 0.
+    """
+    def __init__(self):
+        self.text = ""
+        self.sections = []
+        self._body_start = None  # Start of the body of the section being received
+        self._scan_from = 0
+
+    def feed(self, chunk):
+        """Add a chunk of text and return a list of (index, body) for newly completed sections"""
+        completed = []
+        self.text += chunk
+        # Rescan a header's length back so headers split across chunks are still found
+        for match in SECTION_HEADER.finditer(self.text, max(0, self._scan_from - len("Section 999: "))):
+            if self._body_start is not None and match.start() < self._body_start:
+                continue
+            if self._body_start is not None:
+                completed.append(self._complete(self.text[self._body_start:match.start()]))
+            self._body_start = match.end()
+        self._scan_from = len(self.text)
+        return completed
+
+    def close(self):
+        """Finish the stream and return the last section, if any"""
+        if self._body_start is None:
+            return []
+        completed = [self._complete(self.text[self._body_start:])]
+        self._body_start = None
+        return completed
+
+    def _complete(self, body):
+        self.sections.append(body)
+        return len(self.sections) - 1, body
@@ -0,0 +1,169 @@
+# resilience.py
+import email.utils
+import random
+import threading
+import time
+
+import openai
+
+import config
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while its circuit breaker is open"""
+    pass
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient model API errors (429, 5xx, connection)"""
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None, max_retry_after=None):
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = config.LLM_BACKOFF_BASE_SECONDS if base_delay is None else base_delay
+        self.max_delay = config.LLM_BACKOFF_MAX_SECONDS if max_delay is None else max_delay
+        self.max_retry_after = config.LLM_RETRY_AFTER_MAX_SECONDS if max_retry_after is None else max_retry_after
+
+    @staticmethod
+    def is_retryable(error):
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def retry_after(error):
+        """Seconds the server asked us to wait, from Retry-After(-Ms) headers, or None"""
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            value = headers.get("retry-after")
+            if not value:
+                return None
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                retry_at = email.utils.parsedate_to_datetime(value)
+                return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def delay_for(self, attempt, error):
+        """Delay before retry number `attempt` (0-based), or None to stop retrying"""
+        if attempt >= self.max_retries or not self.is_retryable(error):
+            return None
+        retry_after = self.retry_after(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        # "Full jitter": spreads retries from many sessions instead of synchronising them
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Fails fast after `failure_threshold` consecutive transient failures.
+
+    After `reset_timeout` seconds one trial call is let through (half-open);
+    its success closes the circuit, its failure opens it again.
+    """
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or config.LLM_CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or config.LLM_CIRCUIT_RESET_SECONDS
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self.lock:
+            state = self._state()
+            if state == "open" or (state == "half_open" and self.trial_in_flight):
+                raise CircuitOpenError("Model endpoint is degraded; failing fast until it recovers")
+            if state == "half_open":
+                self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial that neither succeeded nor failed transiently"""
+        with self.lock:
+            self.trial_in_flight = False
+
+
+_semaphores = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+def get_model_semaphore(model):
+    """Process-wide cap on concurrent calls to one model, shared by every session"""
+    with _registry_lock:
+        if model not in _semaphores:
+            _semaphores[model] = threading.BoundedSemaphore(config.LLM_MAX_CONCURRENCY_PER_MODEL)
+        return _semaphores[model]
+
+def get_circuit_breaker(model):
+    """Process-wide circuit breaker for one model endpoint"""
+    with _registry_lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker()
+        return _breakers[model]
+
+def call_with_resilience(model, func, policy=None, acquire_slot=True):
+    """Call `func()` for `model` with retries, the circuit breaker and the concurrency cap.
+
+    Pass acquire_slot=False when the caller already holds the model's semaphore
+    (e.g. for the whole duration of a stream).
+    """
+    policy = policy or RetryPolicy()
+    breaker = get_circuit_breaker(model)
+    semaphore = get_model_semaphore(model)
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        try:
+            if acquire_slot:
+                with semaphore:
+                    result = func()
+            else:
+                result = func()
+        except Exception as e:
+            if not policy.is_retryable(e):
+                breaker.release_trial()
+                raise
+            breaker.record_failure()
+            delay = policy.delay_for(attempt, e)
+            if delay is None:
+                raise
+            print(f"Transient error calling {model} (attempt {attempt + 1}), retrying in {delay:.1f}s: {str(e)}")
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        breaker.record_success()
+        return result
@@ -0,0 +1,20 @@
+# sqlite_store.py
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path, row_factory=None):
+    """Open a short-lived connection to the database at `path`, committing on success.
+
+    A fresh connection per call is what lets the caches and indexes built on
+    it be shared across threads; a sqlite3 connection itself cannot be.
+    """
+    conn = sqlite3.connect(path, timeout=10)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,107 @@
+# stage_executor.py
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class StageError(Exception):
+    """Raised by a stage (or on its behalf) when the pipeline cannot continue"""
+    def __init__(self, message, stage_name=None):
+        super().__init__(message)
+        self.message = message
+        self.stage_name = stage_name
+
+
+class Stage:
+    """A unit of work in the analysis pipeline.
+
+    `func` is called with the results of the stages listed in `depends_on`,
+    passed as keyword arguments named after those stages. `progress` is the
+    share of the progress bar (out of 100) credited when the stage finishes.
+    """
+    def __init__(self, name, func, depends_on=(), progress=0, status_message=None):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.progress = progress
+        self.status_message = status_message
+
+
+def _validate_stages(stages):
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate stage names: {names}")
+
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in known]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    # Kahn's algorithm, only to reject cycles up front
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(stages, progress_bar=None, status_text=None, max_workers=None, thread_initializer=None):
+    """Run pipeline stages, starting each one as soon as its dependencies finish.
+
+    Independent stages run in parallel on a thread pool. Progress and status
+    updates are issued from the calling thread. If a stage fails, no further
+    stages are started, stages already running are allowed to finish, and the
+    first error is re-raised (StageError instances are tagged with the stage name).
+
+    Returns a dict mapping stage name to its result.
+    """
+    _validate_stages(stages)
+
+    pending = {stage.name: stage for stage in stages}
+    results = {}
+    running = {}
+    progress = 0
+    failure = None
+
+    def submit_ready(executor):
+        ready = [stage for stage in pending.values() if all(dep in results for dep in stage.depends_on)]
+        for stage in ready:
+            del pending[stage.name]
+            if status_text and stage.status_message:
+                status_text.text(stage.status_message)
+            kwargs = {dep: results[dep] for dep in stage.depends_on}
+            running[executor.submit(stage.func, **kwargs)] = stage
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages), initializer=thread_initializer) as executor:
+        submit_ready(executor)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name] = future.result()
+                except StageError as e:
+                    if e.stage_name is None:
+                        e.stage_name = stage.name
+                    failure = failure or e
+                    continue
+                except Exception as e:
+                    failure = failure or e
+                    continue
+
+                progress += stage.progress
+                if progress_bar:
+                    progress_bar.progress(min(progress, 100))
+
+            # Everything downstream of a failed stage is cancelled by never being submitted
+            if failure is None:
+                submit_ready(executor)
+
+    if failure is not None:
+        raise failure
+
+    return results
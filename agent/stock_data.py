@@ -1,18 +1,79 @@
 # stock_data.py
-import yfinance as yf
+import numpy as np
 from datetime import datetime, timedelta
 
-def generate_stock_cache(ticker, n_days, status_text):
+import config
+from indicators import compute_indicators, format_indicator_summary
+from intraday import SessionAggregator, fetch_intraday_chunks, format_intraday_summary
+from price_compressor import compress_price_history
+from price_matrix import cross_sectional_stats, find_peer_group, format_peer_summary, get_peer_matrix
+from price_store import get_price_store
+from token_counter import num_tokens_from_string
+
+def _format_stock_cache_iterrows(data):
+    """Reference row-by-row formatter; kept to check format_stock_cache output in the benchmark"""
+    stock_cache = []
+    for date, row in data.iterrows():
+        formatted_date = date.strftime('%m-%d-%Y')
+        stock_cache.append(f"{formatted_date}: price: {row['Close']:.2f}, volatility: {row['Volatility']:.2f}, volume: {int(row['Volume'])}")
+    return "\n".join(stock_cache)
+
+def format_stock_cache(data):
+    """Format daily bars as 'MM-DD-YYYY: price: x, volatility: y, volume: z' lines, whole columns at a time"""
+    if data.empty:
+        return ""
+
+    volume = data['Volume'].to_numpy(dtype=float)
+    if np.isnan(volume).any():
+        raise ValueError("cannot convert float NaN to integer")
+
+    # Building dates from their components is far cheaper than DatetimeIndex.strftime
+    index = data.index
+    dates = np.char.add(np.char.add(np.char.zfill(index.month.to_numpy().astype(str), 2), "-"),
+                        np.char.add(np.char.zfill(index.day.to_numpy().astype(str), 2), "-"))
+    dates = np.char.add(dates, index.year.to_numpy().astype(str))
+
+    lines = np.char.add(dates, ": price: ")
+    lines = np.char.add(lines, np.char.mod('%.2f', data['Close'].to_numpy(dtype=float)))
+    lines = np.char.add(lines, ", volatility: ")
+    lines = np.char.add(lines, np.char.mod('%.2f', (data['High'] - data['Low']).to_numpy(dtype=float)))
+    lines = np.char.add(lines, ", volume: ")
+    lines = np.char.add(lines, volume.astype(np.int64).astype(str))
+
+    return "\n".join(lines.tolist())
+
+def summarize_stock_data(data, token_budget=None):
+    """Compact indicator summary, the last few sessions day by day and older ones as weekly or monthly bars"""
+    # Never spend more than the plain per-day lines would
+    token_budget = min(token_budget or config.STOCK_CACHE_TOKEN_BUDGET, num_tokens_from_string(format_stock_cache(data)))
+    summary = f"{format_indicator_summary(compute_indicators(data))}\nPrice history:\n"
+    history_budget = max(1, token_budget - num_tokens_from_string(summary))
+    # The summary already covers the window, so only the recent tail is worth sending at daily resolution
+    history = compress_price_history(data, format_stock_cache, history_budget,
+                                     daily_sessions=config.STOCK_SUMMARY_RECENT_SESSIONS)
+    return summary + history
+
+def format_price_window(data):
+    """Per-day lines for short windows; an indicator summary once the window gets long and the summary is shorter"""
+    text = format_stock_cache(data)
+    if len(data) > config.STOCK_SUMMARY_MIN_SESSIONS:
+        summary = summarize_stock_data(data)
+        if num_tokens_from_string(summary) < num_tokens_from_string(text):
+            return summary
+    return text
+
+def generate_stock_cache(ticker, n_days, status_text, price_store=None):
     """Fetch and format stock data for the specified ticker"""
     end_date = datetime.today().strftime('%Y-%m-%d')
     start_date = (datetime.today() - timedelta(days=n_days)).strftime('%Y-%m-%d')
 
     if status_text:
         status_text.text(f"Fetching stock data for {ticker}...")
-    
+
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(start=start_date, end=end_date, interval='1d')
+        # Served from the local store; only days not fetched before go to yfinance
+        price_store = price_store or get_price_store()
+        data = price_store.get_history(ticker, start_date, end_date).copy()
 
         if data.empty:
             if status_text:
@@ -21,16 +82,132 @@ def generate_stock_cache(ticker, n_days, status_text):
 
         # Calculate volatility
         data['Volatility'] = data['High'] - data['Low']
-        
+
         # Format the data as a readable string
-        stock_cache = []
-        for date, row in data.iterrows():
-            formatted_date = date.strftime('%m-%d-%Y')
-            stock_cache.append(f"{formatted_date}: price: {row['Close']:.2f}, volatility: {row['Volatility']:.2f}, volume: {int(row['Volume'])}")
+        return format_price_window(data)
 
-        return "\n".join(stock_cache)
-    
     except Exception as e:
         if status_text:
             status_text.text(f"Error fetching stock data: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+def generate_stock_caches(tickers, n_days, status_text, price_store=None):
+    """Fetch and format stock data for a watchlist using batched price downloads.
+
+    Returns ({ticker: stock_cache}, {ticker: error message}).
+    """
+    end_date = datetime.today().strftime('%Y-%m-%d')
+    start_date = (datetime.today() - timedelta(days=n_days)).strftime('%Y-%m-%d')
+
+    if status_text:
+        status_text.text(f"Fetching stock data for {len(tickers)} tickers...")
+
+    price_store = price_store or get_price_store()
+    frames, errors = price_store.get_histories(tickers, start_date, end_date)
+
+    stock_caches = {}
+    for ticker, data in frames.items():
+        try:
+            stock_caches[ticker] = format_price_window(data)
+        except Exception as e:
+            errors[ticker] = str(e)
+
+    if status_text:
+        status_text.text(f"Fetched stock data for {len(stock_caches)} of {len(tickers)} tickers")
+
+    return stock_caches, errors
+
+def generate_intraday_cache(ticker, n_days, interval, status_text, fetch_func=None):
+    """Fetch intraday bars in chunks and summarize them per session (opening range, VWAP, volatility, volume)"""
+    max_days = config.INTRADAY_MAX_DAYS.get(interval)
+    if max_days is None:
+        raise ValueError(f"Unsupported intraday interval: {interval}")
+    # The window starts at midnight, so stay a day inside the provider's limit
+    if n_days >= max_days:
+        if status_text:
+            status_text.text(f"{interval} bars only go back {max_days} days; limiting the window")
+        n_days = max_days - 1
+
+    # One day past today so the current session's bars are included
+    end_date = (datetime.today() + timedelta(days=1)).strftime('%Y-%m-%d')
+    start_date = (datetime.today() - timedelta(days=n_days)).strftime('%Y-%m-%d')
+
+    if status_text:
+        status_text.text(f"Fetching {interval} bars for {ticker}...")
+
+    try:
+        aggregator = SessionAggregator()
+        sessions, failures = [], []
+        for bars in fetch_intraday_chunks(ticker, start_date, end_date, interval, fetch_func=fetch_func,
+                                          failures=failures):
+            sessions.extend(aggregator.feed(bars))
+        sessions.extend(aggregator.close())
+
+        for chunk_start, chunk_end, reason in failures:
+            print(f"Missing {interval} bars for {ticker} {chunk_start} to {chunk_end}: {reason}")
+        if failures and status_text:
+            status_text.text(f"{len(failures)} {interval} requests for {ticker} failed or came back empty; the summary has gaps")
+
+        if not sessions:
+            if status_text:
+                status_text.text(f"No {interval} data found for {ticker}")
+            return None
+        summary = format_intraday_summary(sessions, interval)
+        if failures:
+            gaps = ", ".join(f"{chunk_start} to {chunk_end}" for chunk_start, chunk_end, _ in failures)
+            summary += f"\nNo {interval} bars could be loaded for: {gaps}"
+        return summary
+
+    except Exception as e:
+        if status_text:
+            status_text.text(f"Error fetching intraday data: {str(e)}")
+        return None
+
+def generate_peer_summary(ticker, n_days, status_text, price_store=None):
+    """Compare the ticker with its configured peer group; returns None when it has no group"""
+    group_name, tickers = find_peer_group(ticker)
+    if not group_name:
+        return None
+
+    today = datetime.today()
+    end_date = today.strftime('%Y-%m-%d')
+    start_date = (today - timedelta(days=n_days)).strftime('%Y-%m-%d')
+    matrix_start = (today - timedelta(days=max(n_days, config.PRICE_MATRIX_DAYS))).strftime('%Y-%m-%d')
+
+    if status_text:
+        status_text.text(f"Comparing {ticker} with {group_name} peers...")
+
+    try:
+        price_store = price_store or get_price_store()
+        matrix = get_peer_matrix(group_name, tickers, matrix_start, end_date, price_store, ticker.upper())
+        stats = cross_sectional_stats(matrix, ticker.upper(), start_date)
+        return format_peer_summary(stats, group_name)
+    except Exception as e:
+        print(f"Error comparing {ticker} with peers: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    # Microbenchmark: python stock_data.py
+    import timeit
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    for rows in (30, 365, 5000):
+        index = pd.date_range("2005-01-03", periods=rows, freq="B", tz="America/New_York")
+        low = rng.uniform(50, 150, rows)
+        data = pd.DataFrame({
+            "Open": low + rng.uniform(0, 5, rows),
+            "High": low + rng.uniform(0, 10, rows),
+            "Low": low,
+            "Close": low + rng.uniform(0, 10, rows),
+            "Volume": rng.integers(100_000, 100_000_000, rows),
+        }, index=index)
+        data['Volatility'] = data['High'] - data['Low']
+
+        assert format_stock_cache(data) == _format_stock_cache_iterrows(data), f"Output differs at {rows} rows"
+
+        number = max(1, 5000 // rows)
+        old = timeit.timeit(lambda: _format_stock_cache_iterrows(data), number=number) / number
+        new = timeit.timeit(lambda: format_stock_cache(data), number=number) / number
+        print(f"{rows:>5} rows: iterrows {old * 1000:8.2f} ms, vectorized {new * 1000:7.2f} ms, speedup {old / new:5.1f}x")
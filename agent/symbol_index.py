@@ -0,0 +1,236 @@
+# symbol_index.py
+import bisect
+import csv
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+
+import requests
+
+import config
+
+# Trailing words dropped from company names so "Apple Inc." is found as "apple"
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "plc", "holdings", "holding", "group", "sa", "nv", "ag", "se", "as", "lp", "llc", "trust",
+}
+# Security descriptions some listings append to the company name
+SHARE_DESCRIPTION_PATTERN = re.compile(r'\b(common stock|common shares|ordinary shares|american depositary shares)\b.*$')
+# Listing rows that are not the company's common stock
+NON_COMMON_PATTERN = re.compile(r'\b(warrants?|units?|rights?|notes?|debentures?|preferred|depositary preferred)\b', re.I)
+
+
+def normalize_name(name):
+    """Lowercase a company name and strip punctuation, share-class and legal-form words"""
+    name = name.split(" - ")[0].lower().replace("&", " and ")
+    name = SHARE_DESCRIPTION_PATTERN.sub(" ", name)
+    name = re.sub(r"\bclass [a-z]\b", " ", name)
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """In-memory index of listed symbols and company names.
+
+    Answers exact symbol, exact name, name prefix (bisect over sorted names)
+    and fuzzy name (trigram similarity) lookups without any network access.
+    `popular` lists symbols in popularity order; they lead `ranked_symbols`.
+    """
+    def __init__(self, entries, popular=()):
+        self.names = {}    # symbol -> company name
+        by_name = {}       # normalized name -> symbols
+        for symbol, name in entries:
+            symbol = symbol.strip().upper()
+            if not symbol or symbol in self.names:
+                continue
+            self.names[symbol] = name.strip()
+            key = normalize_name(name)
+            if key:
+                by_name.setdefault(key, []).append(symbol)
+
+        # Shorter symbols first, so a company's primary line (GOOG, BRK-A) leads its share classes
+        self.by_name = {key: sorted(symbols, key=lambda s: (len(s), s)) for key, symbols in by_name.items()}
+        self.sorted_names = sorted(self.by_name)
+        self.trigram_index = {}
+        for key in self.sorted_names:
+            for gram in _trigrams(key):
+                self.trigram_index.setdefault(gram, []).append(key)
+        self.popular = list(popular)
+
+    def __len__(self):
+        return len(self.names)
+
+    def ranked_symbols(self):
+        """All symbols, popular ones first, then in listing order"""
+        popular = [symbol for symbol in dict.fromkeys(s.strip().upper() for s in self.popular) if symbol in self.names]
+        seen = set(popular)
+        return popular + [symbol for symbol in self.names if symbol not in seen]
+
+    def _match(self, symbol, match, score):
+        return {"ticker": symbol, "name": self.names[symbol], "match": match, "score": score}
+
+    def prefix(self, text, limit=10):
+        """Normalized names starting with `text`, in alphabetical order"""
+        key = normalize_name(text)
+        if not key:
+            return []
+        start = bisect.bisect_left(self.sorted_names, key)
+        results = []
+        for name in self.sorted_names[start:]:
+            if not name.startswith(key) or len(results) >= limit:
+                break
+            results.append(name)
+        return results
+
+    def fuzzy(self, text, limit=10):
+        """(name, score) pairs ranked by trigram Dice similarity to `text`"""
+        key = normalize_name(text)
+        grams = _trigrams(key) if key else set()
+        shared = Counter(name for gram in grams for name in self.trigram_index.get(gram, ()))
+        scored = [(name, 2 * count / (len(grams) + len(_trigrams(name)))) for name, count in shared.items()]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def lookup(self, text, limit=5):
+        """Ranked candidate matches for a ticker or company name"""
+        text = text.strip()
+        if not text:
+            return []
+        results, seen = [], set()
+
+        def add(symbols, match, score):
+            for symbol in symbols:
+                if symbol not in seen:
+                    seen.add(symbol)
+                    results.append(self._match(symbol, match, score))
+
+        symbol = text.upper().replace(".", "-")
+        if symbol in self.names:
+            add([symbol], "symbol", 1.0)
+        key = normalize_name(text)
+        if key in self.by_name:
+            add(self.by_name[key], "name", 0.95)
+        for name in self.prefix(text, limit):
+            add(self.by_name[name], "prefix", 0.9 if len(key) >= config.SYMBOL_PREFIX_MIN_LENGTH else 0.5)
+        for name, score in self.fuzzy(text, limit):
+            add(self.by_name[name], "fuzzy", round(score * 0.85, 3))
+        results.sort(key=lambda result: -result["score"])
+        return results[:limit]
+
+    def resolve(self, text):
+        """Return the single confident match for `text`, or None when the input is ambiguous.
+
+        Only "symbol" and "name" matches are exact; "prefix" and "fuzzy" ones are guesses.
+        """
+        key = normalize_name(text)
+        symbol = text.strip().upper().replace(".", "-")
+        if symbol in self.names:
+            return self._match(symbol, "symbol", 1.0)
+        if key in self.by_name:
+            return self._match(self.by_name[key][0], "name", 0.95)
+
+        # A prefix only counts when it picks out one company ("nvid" -> NVIDIA, not "micro")
+        if len(key) >= config.SYMBOL_PREFIX_MIN_LENGTH:
+            names = self.prefix(text, limit=2)
+            if len(names) == 1:
+                return self._match(self.by_name[names[0]][0], "prefix", 0.9)
+            if names:
+                return None
+
+        scored = self.fuzzy(text, limit=2)
+        if scored:
+            best_name, best_score = scored[0]
+            runner_up = scored[1][1] if len(scored) > 1 else 0.0
+            if best_score >= config.SYMBOL_FUZZY_MIN_SCORE and best_score - runner_up >= config.SYMBOL_FUZZY_MIN_MARGIN:
+                return self._match(self.by_name[best_name][0], "fuzzy", round(best_score, 3))
+        return None
+
+
+def read_listing(path):
+    """Read (symbol, name) rows from a symbols CSV"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [(row["symbol"], row["name"]) for row in csv.DictReader(f)]
+
+def _parse_nasdaqtrader(text, symbol_field):
+    rows = []
+    for row in csv.DictReader(io.StringIO(text), delimiter="|"):
+        symbol, name = row.get(symbol_field), row.get("Security Name")
+        # The last line is a "File Creation Time" footer without the other fields
+        if not symbol or not name or row.get("Test Issue") != "N":
+            continue
+        if "$" in symbol or NON_COMMON_PATTERN.search(name):
+            continue
+        # Class shares are listed as BRK.B; yfinance expects BRK-B
+        rows.append((symbol.replace(".", "-"), name.split(" - ")[0]))
+    return rows
+
+def refresh_listing(path=None):
+    """Download the current NASDAQ and NYSE/other listings and write them as a symbols CSV"""
+    path = path or cached_listing_path()
+    rows = []
+    for url, symbol_field in ((config.NASDAQ_LISTED_URL, "Symbol"), (config.OTHER_LISTED_URL, "ACT Symbol")):
+        response = requests.get(url, headers={'User-Agent': config.BROWSER_USER_AGENT}, timeout=config.FETCH_TIMEOUT)
+        response.raise_for_status()
+        rows.extend(_parse_nasdaqtrader(response.text, symbol_field))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["symbol", "name"])
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+    return len(rows)
+
+def cached_listing_path():
+    return os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, config.SYMBOL_LISTING_FILENAME)
+
+def listing_paths():
+    """Symbol listings in the order they are read: the refreshed listing, then the bundled file"""
+    return [path for path in (cached_listing_path(), config.SYMBOL_LISTING_PATH) if os.path.exists(path)]
+
+def load_symbol_index():
+    """Build an index from the refreshed listing when there is one, else the bundled file.
+
+    Bundled names are added after the full listing, so their cleaner names
+    only fill in symbols the listing does not have. The bundled file is
+    ordered by market cap and sets the popularity order.
+    """
+    entries = []
+    if os.path.exists(cached_listing_path()):
+        try:
+            entries.extend(read_listing(cached_listing_path()))
+        except (OSError, KeyError, csv.Error) as e:
+            print(f"Error reading symbol listing: {str(e)}")
+    bundled = read_listing(config.SYMBOL_LISTING_PATH)
+    entries.extend(bundled)
+    return SymbolIndex(entries, popular=[symbol for symbol, _ in bundled])
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_symbol_index():
+    """Return the process-wide symbol index, loading it on first use"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = load_symbol_index()
+        return _default_index
+
+
+if __name__ == "__main__":
+    # Refresh the listing: python symbol_index.py
+    count = refresh_listing()
+    print(f"Wrote {count} symbols to {cached_listing_path()}")
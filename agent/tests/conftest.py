@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# The app imports its modules by bare name from agent/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
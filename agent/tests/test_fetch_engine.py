@@ -0,0 +1,175 @@
+# test_fetch_engine.py
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from article_store import ArticleStore
+from fetch_engine import FetchEngine
+from html_extractor import ARTICLE_START_PATTERN
+from rate_limiter import HostRateLimiter
+
+# Highly compressible, so the whole gzip body is smaller than the probe's byte cap
+PAGE = b"<html><body>" + (b"<p>" + b"x" * 1000 + b"</p>\n") * 500 + b"</body></html>"
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = gzip.compress(PAGE)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"gz"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+ARTICLE_PAGE = b"<html><head></head><body>" + b" " * 40000 + b"<article>" + b"<p>story</p>" * 5000 + b"</article></body></html>"
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves ARTICLE_PAGE uncompressed and honours Range when If-Range still matches"""
+    etag = '"v1"'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+        body, status = ARTICLE_PAGE, 200
+        requested = self.headers.get("Range")
+        if requested and self.headers.get("If-Range") == self.etag:
+            offset = int(requested.split("=")[1].rstrip("-"))
+            body, status = ARTICLE_PAGE[offset:], 206
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", self.etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {offset}-{len(ARTICLE_PAGE) - 1}/{len(ARTICLE_PAGE)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(0.3)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+def serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def gzip_url():
+    server = serve(GzipHandler)
+    yield f"http://127.0.0.1:{server.server_port}/page"
+    server.shutdown()
+
+
+@pytest.fixture
+def range_server():
+    server = serve(RangeHandler)
+    server.ranges = []
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def slow_url():
+    server = serve(SlowHandler)
+    yield f"http://127.0.0.1:{server.server_port}/page"
+    server.shutdown()
+
+
+def test_prefix_cut_at_byte_cap_is_incomplete(gzip_url):
+    result = FetchEngine().fetch_prefix(gzip_url, max_bytes=16 * 1024)
+    assert result.status_code == 200
+    assert len(result.content) < len(PAGE)
+    assert result.bytes_read < len(result.content)  # counted before decompression
+    assert not result.complete
+
+    store = ArticleStore()
+    store.put(gzip_url, result)
+    assert store.get(gzip_url) is None
+
+
+def test_prefix_read_to_the_end_is_complete(gzip_url):
+    result = FetchEngine().fetch_prefix(gzip_url, max_bytes=2 * len(PAGE))
+    assert result.complete
+    assert result.content == PAGE
+
+    store = ArticleStore()
+    store.put(gzip_url, result)
+    assert store.get(gzip_url) is result
+
+
+def test_busy_host_does_not_hold_workers(gzip_url, slow_url):
+    # With one slot per host, queued requests for the slow host must not occupy the two workers
+    engine = FetchEngine(max_workers=2, per_host=1)
+    slow = [engine.submit(f"{slow_url}?{i}") for i in range(6)]
+    start = time.time()
+    assert engine.fetch(gzip_url).ok
+    assert time.time() - start < 0.3
+    assert all(future.result().ok for future in slow)
+
+
+def test_rate_limit_delay_does_not_hold_workers(gzip_url, slow_url):
+    # The throttled requests wait one and two seconds without taking the only worker
+    engine = FetchEngine(max_workers=1)
+    limiter = HostRateLimiter({"127.0.0.1": (1.0, 1)})
+    limited = [engine.submit(f"{gzip_url}?{i}", rate_limiter=limiter) for i in range(3)]
+    start = time.time()
+    assert engine.fetch(slow_url).ok
+    assert time.time() - start < 0.9
+    assert all(future.result().ok for future in limited)
+
+
+def test_probe_prefix_is_resumed_with_a_range_request(range_server):
+    url = f"http://127.0.0.1:{range_server.server_port}/story"
+    engine = FetchEngine()
+    prefix = engine.fetch_prefix(url, stop_pattern=ARTICLE_START_PATTERN)
+    assert not prefix.complete and prefix.resumable
+    assert len(prefix.content) < len(ARTICLE_PAGE) // 2
+
+    store = ArticleStore()
+    store.put(url, prefix)
+    assert store.get(url) is None
+    assert store.get_prefix(url) is prefix
+
+    result = next(engine.fetch_ordered([url], prefixes={url: store.get_prefix(url)}))
+    assert result.ok and result.content == ARTICLE_PAGE
+    assert result.bytes_read == len(ARTICLE_PAGE) - len(prefix.content)
+    assert range_server.ranges == [None, f"bytes={len(prefix.content)}-"]
+
+
+def test_changed_page_is_downloaded_whole(range_server, monkeypatch):
+    url = f"http://127.0.0.1:{range_server.server_port}/story"
+    engine = FetchEngine()
+    prefix = engine.fetch_prefix(url, stop_pattern=ARTICLE_START_PATTERN)
+    monkeypatch.setattr(RangeHandler, "etag", '"v2"')
+    result = next(engine.fetch_ordered([url], prefixes={url: prefix}))
+    assert result.ok and result.content == ARTICLE_PAGE
+    assert result.bytes_read == len(ARTICLE_PAGE)
+
+
+def test_compressed_prefix_is_not_resumable(gzip_url):
+    result = FetchEngine().fetch_prefix(gzip_url, max_bytes=16 * 1024)
+    assert not result.complete and not result.resumable
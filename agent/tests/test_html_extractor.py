@@ -0,0 +1,64 @@
+# test_html_extractor.py
+import os
+
+import pytest
+
+from html_extractor import (_extract_article_bs4, _extract_paragraphs_bs4, _has_article_bs4, extract_article,
+                            extract_paragraphs, has_article)
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "data", "pages")
+PAGES = sorted(name for name in os.listdir(PAGES_DIR) if name.endswith(".html"))
+# Charset each fixture declares; the rest are UTF-8
+ENCODINGS = {"latin1.html": "iso-8859-1"}
+
+CHECKS = [
+    ("probe", _has_article_bs4, has_article),
+    ("paragraphs", _extract_paragraphs_bs4, extract_paragraphs),
+    ("article", _extract_article_bs4, extract_article),
+]
+# Pages where the bs4 reference is wrong and the lxml output is the intended one
+KNOWN_DIFFERENCES = {
+    ("article", "unclosed_tags.html"): "html.parser nests unclosed <p> tags, so bs4 repeats their text",
+}
+
+
+def cases():
+    params = []
+    for check, reference, fast in CHECKS:
+        for name in PAGES:
+            reason = KNOWN_DIFFERENCES.get((check, name))
+            marks = [pytest.mark.xfail(strict=True, reason=reason)] if reason else []
+            params.append(pytest.param(name, reference, fast, id=f"{check}-{name}", marks=marks))
+    return params
+
+
+def load(name):
+    with open(os.path.join(PAGES_DIR, name), "rb") as f:
+        content = f.read()
+    return content, content.decode(ENCODINGS.get(name, "utf-8"))
+
+
+@pytest.mark.parametrize("name, reference, fast", cases())
+def test_lxml_matches_bs4_on_text(name, reference, fast):
+    _, text = load(name)
+    assert fast(text) == reference(text)
+
+
+@pytest.mark.parametrize("name, reference, fast", cases())
+def test_lxml_on_raw_bytes_matches_bs4(name, reference, fast):
+    # Raw bytes are decoded by the parser from the page's own charset declaration
+    content, text = load(name)
+    assert fast(content) == reference(text)
+
+
+def test_corpus_covers_every_container_kind():
+    found = {name: extract_article(load(name)[1]) for name in PAGES}
+    assert found["no_container.html"] is None
+    assert "Officials saw inflation risks" in found["main_only.html"]
+    assert "Same-store sales fell" in found["article_body_div.html"]
+    assert "Société Générale" in found["latin1.html"]
+
+
+def test_unclosed_paragraphs_are_not_repeated():
+    assert extract_article(load("unclosed_tags.html")[1]) == (
+        "Net interest income rose 4%\nTrading revenue was up 12% year on year\nProvisions for credit losses increased")
@@ -0,0 +1,81 @@
+# test_news_index.py
+import json
+
+import feedparser
+import pytest
+
+import config
+import news_processor
+from news_index import NewsIndex
+
+URL = "https://example.com/story"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return NewsIndex(path=str(tmp_path / "news_index.sqlite3"))
+
+
+def stored(index, url=URL):
+    return index.known([url])[url]
+
+
+def test_failed_probe_is_retried_after_the_ttl(index):
+    index.add("AAA", [{"url": URL, "title": "Story", "accessible": 0, "probe_bytes": 100}])
+    assert not index.needs_probe(stored(index), max_age=3600)
+    assert index.needs_probe(stored(index), max_age=0)
+
+    index.record_probe(URL, 1, 2048)
+    row = stored(index)
+    assert (row["accessible"], row["probe_bytes"]) == (1, 2048)
+    assert not index.needs_probe(row, max_age=0)
+
+
+def test_unprobed_row_needs_probe(index):
+    index.add("AAA", [{"url": URL, "title": "Story"}])
+    assert index.needs_probe(stored(index))
+
+
+@pytest.fixture
+def feed(monkeypatch, index, tmp_path):
+    entries = [feedparser.FeedParserDict(title="Story", link=URL, summary="", published="Mon, 06 Oct 2026 12:00:00 GMT")]
+    probes = []
+    result = {"accessible": 0}
+
+    def probe(url, article_store=None):
+        probes.append(url)
+        return result["accessible"], 100
+
+    monkeypatch.setattr(news_processor, "parse_feed", lambda url: feedparser.FeedParserDict(entries=entries))
+    monkeypatch.setattr(news_processor, "scrape_news", probe)
+    monkeypatch.setattr(news_processor, "get_news_index", lambda: index)
+    monkeypatch.setattr(news_processor, "num_tokens_from_strings", lambda strings: [len(s.split()) for s in strings])
+    return probes, result
+
+
+def run_report(tmp_path):
+    def tracked_open(path, mode, tracker_msg=None, **kwargs):
+        return open(path, mode, **kwargs)
+    path = news_processor.get_news_json("AAA", None, 30, str(tmp_path), "{ticker}_news.json", tracked_open)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_report_reprobes_stale_failures_only(feed, tmp_path, monkeypatch):
+    probes, result = feed
+    run_report(tmp_path)
+    assert probes == [URL]
+
+    # Within the TTL the failed probe stands
+    run_report(tmp_path)
+    assert probes == [URL]
+
+    # Past it, the article is probed again and the new result is used
+    monkeypatch.setattr(config, "NEWS_INDEX_REPROBE_SECONDS", 0)
+    result["accessible"] = 1
+    assert run_report(tmp_path)[0]["accessible"] == 1
+    assert probes == [URL, URL]
+
+    # Once accessible, it is not probed again
+    run_report(tmp_path)
+    assert probes == [URL, URL]
@@ -0,0 +1,81 @@
+# test_price_matrix.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_matrix
+from price_matrix import PriceMatrix, cross_sectional_stats, get_peer_matrix
+
+
+def bars(sessions=30, start="2025-01-02"):
+    index = pd.bdate_range(start, periods=sessions)
+    close = 100 + np.arange(sessions, dtype=float)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(sessions, 1e6)}, index=index)
+
+
+class FakePriceStore:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = 0
+
+    def get_histories(self, tickers, start, end):
+        self.calls += 1
+        frames = {ticker: bars() for ticker in tickers if ticker not in self.failing}
+        errors = {ticker: "no data" for ticker in tickers if ticker in self.failing}
+        return frames, errors
+
+
+def data_files(tmp_path):
+    return sorted(path.name for path in tmp_path.glob("*.f8"))
+
+
+def test_write_keeps_a_newer_build_from_another_process(tmp_path):
+    header_path = str(tmp_path / "group.json")
+    # Another process publishes a build stamped in the future while this one is still writing
+    newer = PriceMatrix.write(header_path, {"BBB": bars()})
+    future_file = f"group-{2 ** 62}.f8"
+    os.replace(tmp_path / newer.header["data_file"], tmp_path / future_file)
+    header = dict(newer.header, data_file=future_file)
+    (tmp_path / "group.json").write_text(json.dumps(header))
+
+    matrix = PriceMatrix.write(header_path, {"CCC": bars()})
+    assert matrix.tickers == ["BBB"]
+    assert data_files(tmp_path) == [future_file]
+
+
+def test_write_removes_only_older_builds(tmp_path):
+    header_path = str(tmp_path / "group.json")
+    PriceMatrix.write(header_path, {"AAA": bars()})
+    unrelated = tmp_path / "other-1.f8"
+    unrelated.write_bytes(b"")
+    matrix = PriceMatrix.write(header_path, {"BBB": bars()})
+    assert data_files(tmp_path) == sorted([matrix.header["data_file"], "other-1.f8"])
+
+
+@pytest.fixture
+def peer_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_matrix, "matrix_path", lambda group_name: str(tmp_path / "peers.json"))
+
+
+def test_cached_matrix_without_the_ticker_is_rebuilt(peer_path):
+    tickers = ["AAA", "BBB", "CCC"]
+    get_peer_matrix("peers", tickers, "2025-01-01", "2025-03-01", FakePriceStore(failing={"AAA"}))
+
+    store = FakePriceStore()
+    matrix = get_peer_matrix("peers", tickers, "2025-01-01", "2025-03-01", store, "AAA")
+    assert store.calls == 1
+    assert "AAA" in matrix.columns
+
+    # Once present, the cached build is reused
+    assert get_peer_matrix("peers", tickers, "2025-01-01", "2025-03-01", store, "AAA").header == matrix.header
+    assert store.calls == 1
+
+
+def test_stats_for_a_missing_ticker_raise_value_error(peer_path):
+    matrix = get_peer_matrix("peers", ["AAA", "BBB"], "2025-01-01", "2025-03-01", FakePriceStore(failing={"AAA"}))
+    with pytest.raises(ValueError):
+        cross_sectional_stats(matrix, "AAA")
@@ -0,0 +1,141 @@
+# test_resilience.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+import config
+import resilience
+from model_manager import ModelManager
+from resilience import CircuitOpenError, get_circuit_breaker
+
+COMPLETION = {"id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+              "choices": [{"index": 0, "message": {"role": "assistant", "content": "hello"},
+                           "finish_reason": "stop"}]}
+CHUNK = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o",
+         "choices": [{"index": 0, "delta": {"content": "hel"}, "finish_reason": None}]}
+
+
+def ok():
+    return 200, {}, json.dumps(COMPLETION).encode()
+
+def error(status, headers=None):
+    return status, headers or {}, json.dumps({"error": {"message": "unavailable", "type": "server_error"}}).encode()
+
+def broken_stream():
+    # One chunk, then the connection drops before the declared length is sent
+    return 200, {"Content-Type": "text/event-stream", "X-Truncate": "1"}, f"data: {json.dumps(CHUNK)}\n\n".encode()
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers chat completions from the server's scripted replies; the last one repeats"""
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            status, headers, body = server.replies.pop(0) if len(server.replies) > 1 else server.replies[0]
+        headers = dict(headers)
+        length = len(body) + 100 if headers.pop("X-Truncate", None) else len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "application/json"))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.replies = [ok()]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(config, "OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setattr(config, "LLM_BACKOFF_BASE_SECONDS", 0.0)
+    # Fresh breakers so failures from one test do not leak into the next
+    monkeypatch.setattr(resilience, "_breakers", {})
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def manager(server):
+    return ModelManager(api_key="test", use_cache=False)
+
+
+def test_honours_retry_after_on_429(server, manager):
+    server.replies = [error(429, {"Retry-After": "0.3"}), ok()]
+    start = time.time()
+    assert manager.invoke_model("analysis", "hi") == "hello"
+    # Backoff is zero here, so the wait can only come from the header
+    assert time.time() - start >= 0.3
+    assert server.requests == 2
+
+
+def test_backs_off_on_5xx(server, manager, monkeypatch):
+    monkeypatch.setattr(config, "LLM_BACKOFF_BASE_SECONDS", 1.0)
+    delays = []
+    monkeypatch.setattr(resilience.time, "sleep", delays.append)
+    server.replies = [error(500), error(502), ok()]
+    assert manager.invoke_model("analysis", "hi") == "hello"
+    assert server.requests == 3
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 1.0 and 0 <= delays[1] <= 2.0
+
+
+def test_gives_up_after_max_retries(server, manager, monkeypatch):
+    monkeypatch.setattr(config, "LLM_MAX_RETRIES", 1)
+    server.replies = [error(503)]
+    with pytest.raises(openai.InternalServerError):
+        manager.invoke_model("analysis", "hi")
+    assert server.requests == 2
+
+
+def test_circuit_opens_then_half_opens(server, manager, monkeypatch):
+    monkeypatch.setattr(config, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(config, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(config, "LLM_CIRCUIT_RESET_SECONDS", 0.3)
+    server.replies = [error(503)]
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            manager.invoke_model("analysis", "hi")
+
+    # Open: fails fast without reaching the server
+    with pytest.raises(CircuitOpenError):
+        manager.invoke_model("analysis", "hi")
+    assert server.requests == 2
+
+    # Half-open: one trial goes through, and its failure opens the circuit again
+    time.sleep(0.35)
+    assert get_circuit_breaker("gpt-4o").state == "half_open"
+    with pytest.raises(openai.InternalServerError):
+        manager.invoke_model("analysis", "hi")
+    assert get_circuit_breaker("gpt-4o").state == "open"
+
+    # A successful trial closes it
+    time.sleep(0.35)
+    server.replies = [ok()]
+    assert manager.invoke_model("analysis", "hi") == "hello"
+    assert get_circuit_breaker("gpt-4o").state == "closed"
+    assert server.requests == 4
+
+
+def test_stream_failure_counts_against_circuit(server, manager, monkeypatch):
+    monkeypatch.setattr(config, "LLM_CIRCUIT_FAILURE_THRESHOLD", 1)
+    server.replies = [broken_stream()]
+    parts = []
+    with pytest.raises(Exception):
+        for part in manager.stream_model("analysis", "hi"):
+            parts.append(part)
+    assert parts == ["hel"]
+    assert get_circuit_breaker("gpt-4o").state == "open"
@@ -0,0 +1,52 @@
+# test_stock_data.py
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import price_compressor
+import stock_data
+from stock_data import format_price_window, format_stock_cache, summarize_stock_data
+
+DAILY_LINE = re.compile(r"^\d\d-\d\d-\d{4}: price: ", re.M)
+
+
+def count_tokens(text, *args):
+    # Words and punctuation, close to how BPE splits these lines; keeps the test off the network
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+@pytest.fixture(autouse=True)
+def offline_tokens(monkeypatch):
+    monkeypatch.setattr(stock_data, "num_tokens_from_string", count_tokens)
+    monkeypatch.setattr(price_compressor, "num_tokens_from_string", count_tokens)
+
+
+def bars(sessions):
+    index = pd.bdate_range("2025-01-02", periods=sessions)
+    rng = np.random.default_rng(0)
+    close = 100 + rng.normal(0, 1, sessions).cumsum()
+    return pd.DataFrame({"Open": close - 0.5, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": rng.integers(1_000_000, 5_000_000, sessions)}, index=index)
+
+
+def test_summary_is_smaller_than_daily_lines():
+    data = bars(21)
+    summary = summarize_stock_data(data)
+    assert count_tokens(summary) < count_tokens(format_stock_cache(data))
+    assert len(DAILY_LINE.findall(summary)) <= config.STOCK_SUMMARY_RECENT_SESSIONS
+
+
+@pytest.mark.parametrize("sessions", [30, 120, 250])
+def test_summary_keeps_only_recent_sessions_daily(sessions):
+    data = bars(sessions)
+    summary = summarize_stock_data(data)
+    assert DAILY_LINE.findall(summary) == DAILY_LINE.findall(format_stock_cache(data.iloc[-config.STOCK_SUMMARY_RECENT_SESSIONS:]))
+    assert count_tokens(summary) <= config.STOCK_CACHE_TOKEN_BUDGET
+
+
+def test_short_window_keeps_daily_lines():
+    data = bars(config.STOCK_SUMMARY_MIN_SESSIONS + 1)
+    assert count_tokens(format_price_window(data)) <= count_tokens(format_stock_cache(data))
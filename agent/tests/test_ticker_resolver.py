@@ -0,0 +1,53 @@
+# test_ticker_resolver.py
+import pytest
+
+import config
+import ticker_resolver
+from symbol_index import SymbolIndex, read_listing
+
+# Symbols yfinance knows that the bundled listing does not have
+LIVE_TICKERS = {"WELL": "Welltower Inc.", "GOLD": "Barrick Gold Corporation"}
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    index = SymbolIndex(read_listing(config.SYMBOL_LISTING_PATH))
+    lookups = []
+
+    def basic_info(symbol, quote_cache=None):
+        lookups.append(symbol)
+        if symbol in LIVE_TICKERS:
+            return {"valid": True, "ticker": symbol, "name": LIVE_TICKERS[symbol], "current_price": 10.0}
+        return {"valid": False}
+
+    def no_model(api_key):
+        raise AssertionError("the model should not be needed")
+
+    monkeypatch.setattr(ticker_resolver, "get_symbol_index", lambda: index)
+    monkeypatch.setattr(ticker_resolver, "get_basic_info", basic_info)
+    monkeypatch.setattr(ticker_resolver, "ModelManager", no_model)
+    return lookups
+
+
+@pytest.mark.parametrize("text, ticker", [("AAPL", "AAPL"), ("apple", "AAPL"), ("Tesla, Inc.", "TSLA")])
+def test_exact_symbol_or_name_is_verified_offline(resolver, text, ticker):
+    result = ticker_resolver.resolve_ticker(text, "key")
+    assert result["verified"] and result["best_match"] == ticker
+    assert resolver == []
+
+
+@pytest.mark.parametrize("text", ["WELL", "GOLD"])
+def test_live_ticker_wins_over_name_prefix(resolver, text):
+    result = ticker_resolver.resolve_ticker(text, "key")
+    assert result["verified"]
+    assert result["best_match"] == text
+    assert result["company_name"] == LIVE_TICKERS[text]
+
+
+@pytest.mark.parametrize("text, suggestion", [("tes", "TSLA"), ("bank", "BAC")])
+def test_partial_name_is_only_a_suggestion(resolver, text, suggestion):
+    result = ticker_resolver.resolve_ticker(text, "key")
+    assert not result["verified"]
+    assert result["best_match"] == suggestion
+    assert resolver == [text.upper()]
+    assert all(not alt["verified"] for alt in result["alternatives"])
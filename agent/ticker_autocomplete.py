@@ -0,0 +1,126 @@
+# ticker_autocomplete.py
+import bisect
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+import config
+from symbol_index import NAME_SUFFIXES, get_symbol_index, listing_paths, normalize_name
+
+# Bumped whenever key normalization changes, so older serialized indexes are rebuilt
+INDEX_VERSION = 2
+
+def _pack(strings):
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+def _unpack(array):
+    return array.tobytes().decode("utf-8").split("\n")
+
+
+class TickerCompleter:
+    """Prefix completion over ticker symbols and company names using sorted arrays.
+
+    Built from the SymbolIndex, so names and normalization match the
+    resolver. Every symbol is indexed under its own key and under its
+    company name. A query is a bisect for the range of keys starting with the
+    typed prefix; within that range the most popular symbols (lowest rank)
+    win. The index serializes to a compact .npz of packed strings and integer
+    arrays, which loads much faster than rebuilding it.
+    """
+    def __init__(self, symbols, names, keys, key_symbols):
+        self.symbols = symbols          # rank -> symbol
+        self.names = names              # rank -> company name
+        self.keys = keys                # sorted search keys
+        self.key_symbols = key_symbols  # np.int32 array: key position -> symbol rank
+        self.symbol_ranks = {symbol: rank for rank, symbol in enumerate(symbols)}
+
+    @classmethod
+    def build(cls, symbol_index):
+        """Build from a SymbolIndex, ranking its symbols by popularity"""
+        symbols = symbol_index.ranked_symbols()
+        names = [symbol_index.names[symbol] for symbol in symbols]
+
+        pairs = set()
+        for rank, (symbol, name) in enumerate(zip(symbols, names)):
+            pairs.add((normalize_name(symbol), rank))
+            name_key = normalize_name(name)
+            if name_key:
+                pairs.add((name_key, rank))
+        pairs = sorted(pairs)
+        return cls(symbols, names, [key for key, _ in pairs], np.array([rank for _, rank in pairs], dtype=np.int32))
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, version=np.array([INDEX_VERSION]), symbols=_pack(self.symbols), names=_pack(self.names),
+                 keys=_pack(self.keys), key_symbols=self.key_symbols)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if "version" not in data or int(data["version"][0]) != INDEX_VERSION:
+                raise ValueError("autocomplete index was built by an older version")
+            return cls(_unpack(data["symbols"]), _unpack(data["names"]), _unpack(data["keys"]), data["key_symbols"])
+
+    def complete(self, text, limit=8):
+        """Top `limit` (symbol, name) completions for typed text, an exact symbol first"""
+        prefix = normalize_name(text)
+        if not prefix:
+            return []
+        lo, hi = self._key_range(prefix)
+        words = prefix.split()
+        # Index keys drop legal-form words, so "apple in" is looked up as "apple"
+        if lo == hi and len(words) > 1 and any(suffix.startswith(words[-1]) for suffix in NAME_SUFFIXES):
+            lo, hi = self._key_range(" ".join(words[:-1]))
+        if lo == hi:
+            return []
+
+        ranks = self.key_symbols[lo:hi]
+        # Only the best few ranks matter; a symbol can appear under two keys, so take a margin
+        if len(ranks) > 2 * limit:
+            ranks = ranks[np.argpartition(ranks, 2 * limit)[:2 * limit]]
+        ordered = list(dict.fromkeys(np.sort(ranks).tolist()))
+
+        exact = self.symbol_ranks.get(text.strip().upper().replace(".", "-"))
+        if exact is not None:
+            ordered = [exact] + [rank for rank in ordered if rank != exact]
+        return [(self.symbols[rank], self.names[rank]) for rank in ordered[:limit]]
+
+    def _key_range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        return lo, bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+
+def completer_path():
+    return os.path.join(tempfile.gettempdir(), config.CACHE_DIR_NAME, config.AUTOCOMPLETE_INDEX_FILENAME)
+
+def load_ticker_completer():
+    """Load the serialized completer, rebuilding it when a listing file is newer"""
+    path = completer_path()
+    source_mtime = max(os.path.getmtime(source) for source in listing_paths())
+    if os.path.exists(path) and os.path.getmtime(path) >= source_mtime:
+        try:
+            return TickerCompleter.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading autocomplete index: {str(e)}")
+
+    completer = TickerCompleter.build(get_symbol_index())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        completer.save(path)
+    except OSError as e:
+        print(f"Error saving autocomplete index: {str(e)}")
+    return completer
+
+
+_default_completer = None
+_default_completer_lock = threading.Lock()
+
+def get_ticker_completer():
+    """Return the process-wide ticker completer"""
+    global _default_completer
+    with _default_completer_lock:
+        if _default_completer is None:
+            _default_completer = load_ticker_completer()
+        return _default_completer
@@ -1,28 +1,109 @@
 # ticker_resolver.py
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import yfinance as yf
+import config
 from model_manager import ModelManager
+from quote_cache import get_quote_cache
+from symbol_index import get_symbol_index
 
-def get_basic_info(ticker_symbol):
+def get_basic_info(ticker_symbol, quote_cache=None):
     """Get basic info about a ticker to validate if it exists"""
+    quote_cache = quote_cache or get_quote_cache()
+    cached = quote_cache.get(ticker_symbol)
+    if cached is not None:
+        return cached
+
     try:
         stock = yf.Ticker(ticker_symbol)
         info = stock.info
         if 'regularMarketPrice' in info and info['regularMarketPrice'] is not None:
-            return {
+            result = {
                 "valid": True,
                 "ticker": ticker_symbol,
                 "name": info.get('shortName', ''),
                 "current_price": info.get('regularMarketPrice', 'N/A')
             }
-        return {"valid": False}
+        else:
+            result = {"valid": False}
+        # Errors are not cached, so a network blip does not mark a real ticker invalid
+        quote_cache.put(ticker_symbol, result)
+        return result
     except Exception as e:
         print(f"Error checking {ticker_symbol}: {str(e)}")
         return {"valid": False}
 
+_verify_executor = None
+_verify_executor_lock = threading.Lock()
+
+def _get_verify_executor():
+    # Long-lived, so a lookup that overruns its timeout does not hold up the caller on shutdown
+    global _verify_executor
+    with _verify_executor_lock:
+        if _verify_executor is None:
+            _verify_executor = ThreadPoolExecutor(max_workers=config.TICKER_VERIFY_MAX_WORKERS,
+                                                  thread_name_prefix="ticker-verify")
+        return _verify_executor
+
+def verify_tickers(ticker_symbols, timeout=None):
+    """Check several tickers concurrently; returns {ticker: get_basic_info result}.
+
+    Lookups still running after `timeout` seconds are reported as invalid.
+    """
+    timeout = timeout or config.TICKER_VERIFY_TIMEOUT
+    executor = _get_verify_executor()
+    futures = {symbol: executor.submit(get_basic_info, symbol) for symbol in dict.fromkeys(ticker_symbols)}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for symbol, future in futures.items():
+        if future.done():
+            results[symbol] = future.result()
+        else:
+            print(f"Timed out checking {symbol}")
+            results[symbol] = {"valid": False, "timed_out": True}
+    return results
+
+def resolve_from_index(input_text, symbol_index=None):
+    """Resolve common tickers and company names from the offline symbol index, or return None.
+
+    Only an exact symbol or exact company name is marked verified; prefix and
+    fuzzy matches come back unverified, with other candidates as alternatives.
+    """
+    symbol_index = symbol_index or get_symbol_index()
+    match = symbol_index.resolve(input_text)
+    if match is None:
+        return None
+    verified = match["match"] in ("symbol", "name")
+    alternatives = []
+    if not verified:
+        alternatives = [{"ticker": candidate["ticker"], "name": candidate["name"], "verified": False}
+                        for candidate in symbol_index.lookup(input_text, limit=4)
+                        if candidate["ticker"] != match["ticker"]][:3]
+    return {
+        "is_valid_ticker": match["match"] == "symbol",
+        "input": input_text,
+        "best_match": match["ticker"],
+        "company_name": match["name"],
+        "alternatives": alternatives,
+        "confidence": int(match["score"] * 100),
+        "verified": verified,
+        "source": "symbol_index"
+    }
+
 def resolve_ticker(input_text, api_key):
     """Master function to resolve ticker symbols using ModelManager"""
-    # First check if the input is already a valid ticker
+    # Listed symbols and exact company names resolve locally, without any network call
+    local_result = None
+    try:
+        local_result = resolve_from_index(input_text)
+        if local_result and local_result["verified"]:
+            return local_result
+    except Exception as e:
+        print(f"Error in symbol index lookup: {str(e)}")
+
+    # Next check if the input is already a valid ticker
     direct_check = get_basic_info(input_text.upper())
     
     if direct_check["valid"]:
@@ -37,6 +118,11 @@ def resolve_ticker(input_text, api_key):
             "verified": True
         }
     
+    # A partial or fuzzy name match is only a suggestion: the bundled index is
+    # small, so "WELL" must not silently become Wells Fargo
+    if local_result:
+        return local_result
+
     # If not a valid ticker, use model to resolve
     model_manager = ModelManager(api_key)
     
@@ -74,9 +160,14 @@ def resolve_ticker(input_text, api_key):
         
         ai_result = json.loads(response)
         
+        # Verify the suggested ticker and the alternatives concurrently
+        candidates = [ai_result["best_match"]] if ai_result.get("best_match") else []
+        candidates += [alt["ticker"] for alt in ai_result.get("alternatives", []) if alt.get("ticker")]
+        verifications = verify_tickers(candidates)
+
         # Verify the suggested ticker actually exists
         if ai_result.get("best_match"):
-            verification = get_basic_info(ai_result["best_match"])
+            verification = verifications[ai_result["best_match"]]
             ai_result["verified"] = verification["valid"]
             
             if verification["valid"]:
@@ -86,7 +177,7 @@ def resolve_ticker(input_text, api_key):
         # Verify alternatives too
         verified_alternatives = []
         for alt in ai_result.get("alternatives", []):
-            alt_verify = get_basic_info(alt["ticker"])
+            alt_verify = verifications.get(alt.get("ticker"), {"valid": False})
             if alt_verify["valid"]:
                 alt["verified"] = True
                 alt["current_price"] = alt_verify["current_price"]
@@ -0,0 +1,76 @@
+# token_counter.py
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import tiktoken
+
+import config
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name="cl100k_base"):
+    """Build each tiktoken encoder once per process"""
+    return tiktoken.get_encoding(encoding_name)
+
+
+class TokenCounter:
+    """Counts tokens with a shared encoder and memoizes counts of repeated strings"""
+    def __init__(self, encoding_name="cl100k_base", cache_size=None):
+        self.encoding_name = encoding_name
+        self.cache_size = cache_size or config.TOKEN_COUNT_CACHE_SIZE
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remember(self, string, count):
+        self.cache[string] = count
+        self.cache.move_to_end(string)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def count(self, string):
+        """Returns the number of tokens in a text string."""
+        with self.lock:
+            if string in self.cache:
+                self.cache.move_to_end(string)
+                return self.cache[string]
+        count = len(get_encoding(self.encoding_name).encode(string))
+        with self.lock:
+            self._remember(string, count)
+        return count
+
+    def count_batch(self, strings):
+        """Returns token counts for a list of strings, encoding the uncached ones in one batch"""
+        strings = list(strings)
+        counts = {}
+        with self.lock:
+            for string in strings:
+                if string in self.cache:
+                    counts[string] = self.cache[string]
+        missing = list(dict.fromkeys(s for s in strings if s not in counts))
+        if missing:
+            encoded = get_encoding(self.encoding_name).encode_batch(missing)
+            with self.lock:
+                for string, tokens in zip(missing, encoded):
+                    counts[string] = len(tokens)
+                    self._remember(string, len(tokens))
+        return [counts[string] for string in strings]
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+def get_token_counter(encoding_name="cl100k_base"):
+    """Return the process-wide counter for an encoding"""
+    with _counters_lock:
+        if encoding_name not in _counters:
+            _counters[encoding_name] = TokenCounter(encoding_name)
+        return _counters[encoding_name]
+
+def num_tokens_from_string(string, encoding_name="cl100k_base"):
+    """Returns the number of tokens in a text string."""
+    return get_token_counter(encoding_name).count(string)
+
+def num_tokens_from_strings(strings, encoding_name="cl100k_base"):
+    """Returns the number of tokens in each of a list of text strings."""
+    return get_token_counter(encoding_name).count_batch(strings)
@@ -1,21 +1,15 @@
 import requests
-from bs4 import BeautifulSoup
 import feedparser
 import json
 from datetime import datetime, timedelta
 import pytz
 import os
 import time
-import tiktoken # For num_tokens_from_string
-import re
 
 import config
-
-def num_tokens_from_string(string, encoding_name="cl100k_base"):
-    """Returns the number of tokens in a text string."""
-    encoding = tiktoken.get_encoding(encoding_name)
-    num_tokens = len(encoding.encode(string))
-    return num_tokens
+from html_extractor import extract_article, extract_paragraphs, has_article
+from rate_limiter import get_host_rate_limiter
+from token_counter import num_tokens_from_string
 
 def extract_date(date_string): # Helper for get_news_json
     try:
@@ -27,10 +21,8 @@ def extract_date(date_string): # Helper for get_news_json
 def extract_news_content(url):
     try:
         response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-        soup = BeautifulSoup(response.text, "lxml")
-        paragraphs = soup.find_all('p')
-        content = "\n".join([para.get_text() for para in paragraphs])
-        return content.strip() if content else "⚠ Unable to extract article content."
+        content = extract_paragraphs(response.text)
+        return content if content else "⚠ Unable to extract article content."
     except Exception as e:
         return f"⚠ Extraction failed: {str(e)}"
 
@@ -51,6 +43,7 @@ def fetch_news(status_text, economy_rss_feeds, log_network_operation_func=None):
             
             if log_network_operation_func:
                  log_network_operation_func(entry.link, "SCRAPE_ATTEMPT", f"Extracting content for {entry.title[:30]}...")
+            get_host_rate_limiter().acquire(entry.link) # Per-host politeness instead of a flat sleep
             full_content = extract_news_content(entry.link) # Uses extract_news_content from this file
 
             article_data = {
@@ -60,7 +53,6 @@ def fetch_news(status_text, economy_rss_feeds, log_network_operation_func=None):
                 "content": full_content
             }
             source_articles.append(article_data)
-            time.sleep(1)
 
         news_cache[source_name] = source_articles
 
@@ -75,9 +67,7 @@ def scrape_news(url):
         if response.status_code != 200:
             return 0 # Not accessible or error
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        article = soup.find("article") or soup.find("div", {"class": "content"})
-        return 1 if article else 0 # Found content structure
+        return 1 if has_article(response.text) else 0 # Found content structure
     except:
         return 0 # Any exception means not accessible for this quick check
 
@@ -216,17 +206,9 @@ def scrape_and_cache_articles(json_file_path, ticker, status_text, max_tokens_ne
                 if debug_log_func: debug_log_func(f"Article returned status code: {response.status_code}", status_text)
                 continue
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            # Enhanced article body selection
-            article_body = soup.find("article") or \
-                           soup.find("div", class_=re.compile(r'(article|content|story|post)-?(body|content|text)', re.I)) or \
-                           soup.find("main") 
-            
-            content_extracted_this_article = ""
-            if article_body:
-                paragraphs = article_body.find_all("p")
-                content_extracted_this_article = "\n".join([p.get_text(separator=' ', strip=True) for p in paragraphs])
-                
+            # Article body: <article>, else a *-body/*-content div, else <main>
+            content_extracted_this_article = extract_article(response.text)
+            if content_extracted_this_article is not None:
                 article_tokens = num_tokens_from_string(content_extracted_this_article)
                 
                 if total_tokens + article_tokens > max_tokens_news_scraping:
@@ -4,6 +4,7 @@ import asyncio
 import os
 import tempfile
 from datetime import datetime, timedelta
+from functools import lru_cache
 from mcp.server.fastmcp import FastMCP
 from bs4 import BeautifulSoup
 import feedparser
@@ -17,9 +18,14 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 
 YAHOO_FINANCE_RSS = "https://finance.yahoo.com/rss/headline?s={symbol}"
 
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name="cl100k_base"):
+    """Build each tiktoken encoder once per process"""
+    return tiktoken.get_encoding(encoding_name)
+
 def num_tokens_from_string(string, encoding_name="cl100k_base"):
     """Returns the number of tokens in a text string."""
-    encoding = tiktoken.get_encoding(encoding_name)
+    encoding = get_encoding(encoding_name)
     num_tokens = len(encoding.encode(string))
     return num_tokens
 